@@ -1,17 +1,27 @@
 import os  
+import click
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 
 from config import Config
 from database import init_db, db
 from routes.main import main_bp
 from routes.auth import auth_bp
+from commands import register_commands
+from serialization import OrjsonProvider
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Behind Nginx / Render: trust X-Forwarded-* from the configured number of hops
+if Config.PROXY_FIX_X_FOR or Config.PROXY_FIX_X_PROTO:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.PROXY_FIX_X_FOR, x_proto=Config.PROXY_FIX_X_PROTO)
+
+# Fast JSON (orjson) for jsonify and request parsing
+app.json = OrjsonProvider(app)
+
 # CORS (Vite frontend)
 CORS(
     app,
@@ -21,7 +31,12 @@ CORS(
 
 # Initialize DB and Migrations
 init_db(app)
-migrate = Migrate(app, db)
+
+# Flask-Migrate pulls in alembic (~0.5s). Only `flask db ...` needs it, and
+# the flask CLI loads the app inside a click context; servers don't.
+if click.get_current_context(silent=True) is not None:
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
 
 # Initialize JWT
 jwt = JWTManager(app)
@@ -30,6 +45,9 @@ jwt = JWTManager(app)
 app.register_blueprint(main_bp)
 app.register_blueprint(auth_bp)
 
+# CLI commands (flask refresh-articles, ...)
+register_commands(app)
+
 
 if __name__ == '__main__':
     app.run(
@@ -0,0 +1,52 @@
+"""
+Compares two benchmark result files.
+
+    python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Exits with status 1 when any benchmark regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+# The headline number for each kind of result (lower is better)
+METRIC = {'micro': 'median', 'load': 'p95', 'startup': 'median'}
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {r['name']: r for r in report['results']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    base_report, base = load(args.base)
+    head_report, head = load(args.head)
+    print(f"base {base_report['revision']}  ->  head {head_report['revision']}\n")
+
+    regressions = 0
+    for name in sorted(set(base) | set(head)):
+        if name not in base or name not in head:
+            print(f"{name:<32} {'only in ' + ('head' if name in head else 'base')}")
+            continue
+
+        metric = METRIC.get(head[name]['kind'], 'median')
+        old, new = base[name][metric], head[name][metric]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{name:<32} {metric:<7} {old:>12.6f} -> {new:>12.6f}  {change:+7.1f}%{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
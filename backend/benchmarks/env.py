@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+# Variables that must be in place before config.py / app.py are imported.
+# Explicit assignment (not setdefault) so a developer .env can never point
+# a benchmark at a real database or the real Gemini key pool.
+BENCH_ENV = {
+    'JWT_SECRET_KEY': 'benchmark-secret-key-not-for-production-use',
+    'GOOGLE_API_KEYS': 'bench-key-0001,bench-key-0002,bench-key-0003',
+    'PASSWORD_HASH_WORKERS': '0',
+    'LOGIN_RATE_IP_CAPACITY': '100000',
+    # Measure generation, not the quota limiter
+    'GENERATE_USER_CAPACITY': '100000',
+    'GENERATE_GLOBAL_CAPACITY': '100000',
+    # Fetch benchmarks measure HTTP + parsing: no page cache, no politeness pacing
+    'FETCH_CACHE_MAX_BYTES': '0',
+    'FETCH_RATE_PER_HOST': '0',
+    'FETCH_MAX_CONCURRENCY_PER_HOST': '64',
+    # Distinct names so scenarios can exhaust one tier's quota
+    'GEMINI_MODEL': 'bench-standard',
+    'GEMINI_MODEL_FAST': 'bench-standard',
+    'GEMINI_MODEL_FALLBACK': 'bench-fallback',
+    'FLASK_ENV': 'benchmark',
+}
+
+
+def default_database_url():
+    path = os.path.join(tempfile.gettempdir(), 'wikiquiz_bench.sqlite3')
+    return f"sqlite:///{path}"
+
+
+def configure(database_url=None):
+    """Sets benchmark env vars. Call before importing any backend module."""
+    os.environ.update(BENCH_ENV)
+    os.environ['DATABASE_URL'] = database_url or default_database_url()
+
+
+def _sqlite_jsonb():
+    # models.py uses PostgreSQL JSONB; store it as plain JSON on SQLite.
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(JSONB, 'sqlite')
+    def compile_jsonb_sqlite(type_, compiler, **kw):
+        return 'JSON'
+
+
+def create_app():
+    """Imports the real Flask app and gives it a fresh schema."""
+    _sqlite_jsonb()
+    from app import app
+    from database import db
+
+    # Cookies are set without TLS in the test client
+    app.config['JWT_COOKIE_SECURE'] = False
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+class BenchClient:
+    """Logged-in Flask test client that sends the CSRF header on writes."""
+
+    def __init__(self, app, username='bench'):
+        from database import db
+        from models import User
+        from services.passwords import hash_password
+
+        with app.app_context():
+            if not User.query.filter_by(username=username).first():
+                db.session.add(User(
+                    username=username,
+                    email=f"{username}@bench.invalid",
+                    password_hash=hash_password('benchmark-password')
+                ))
+                db.session.commit()
+
+        self.client = app.test_client()
+        r = self.client.post('/api/auth/login', json={
+            'username': username, 'password': 'benchmark-password'
+        })
+        if r.status_code != 200:
+            raise RuntimeError(f"Benchmark login failed: {r.status_code} {r.get_json()}")
+        self.csrf = r.get_json()['csrf_access_token']
+
+    def get(self, path, **kwargs):
+        return self.client.get(path, **kwargs)
+
+    def post(self, path, **kwargs):
+        headers = kwargs.pop('headers', {})
+        headers['X-CSRF-TOKEN'] = self.csrf
+        return self.client.post(path, headers=headers, **kwargs)
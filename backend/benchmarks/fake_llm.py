@@ -0,0 +1,57 @@
+import json
+import random
+import re
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks.fixtures import make_questions
+
+
+class FakeLLM:
+    """
+    Offline replacement for ChatGoogleGenerativeAI.
+    latency: seconds slept per call. quota_error_rate: fraction of calls
+    that fail with a Gemini-style 429 RESOURCE_EXHAUSTED error.
+    exhausted_models: models whose every call fails with a 429.
+    """
+
+    def __init__(self, latency=0.0, quota_error_rate=0.0, seed=0, exhausted_models=()):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.exhausted_models = set(exhausted_models)
+        self.calls = 0
+        self.calls_by_model = {}
+        self.quota_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt_value, model=None):
+        prompt = prompt_value.to_string()
+        with self._lock:
+            self.calls += 1
+            self.calls_by_model[model] = self.calls_by_model.get(model, 0) + 1
+            fail = model in self.exhausted_models or self._rng.random() < self.quota_error_rate
+            if fail:
+                self.quota_errors += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise Exception("429 RESOURCE_EXHAUSTED: Quota exceeded (fake)")
+
+        if 'quiz creator' in prompt:
+            sections = len(re.findall(r"^\s*\[S\d+\] ", prompt, re.M))
+            return AIMessage(content=json.dumps(make_questions(prompt, sections=sections)))
+        return AIMessage(content="A short factual summary of the article.")
+
+    def get_llm(self, timeout=None, model=None):
+        """Drop-in for services.ai_generator.get_llm."""
+        return RunnableLambda(lambda prompt_value: self._respond(prompt_value, model))
+
+    def install(self):
+        from services import ai_generator
+        ai_generator.get_llm = self.get_llm
+        return self
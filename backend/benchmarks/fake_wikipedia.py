@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from benchmarks.fixtures import make_article_html
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if not self.path.startswith('/wiki/'):
+            self.send_error(404)
+            return
+
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if server.latency:
+                time.sleep(server.latency)
+
+            title = unquote(self.path[len('/wiki/'):].split('?', 1)[0]).replace('_', ' ')
+            body = make_article_html(title, paragraphs=server.paragraphs).encode('utf-8')
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+            if self.headers.get('If-None-Match') == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeWikipedia:
+    """
+    Local stand-in for en.wikipedia.org serving generated fixture pages.
+    Any /wiki/<Title> path returns a page for that title, with an ETag
+    (conditional requests get a 304). `latency` delays every response;
+    `max_in_flight` records the peak number of concurrent requests.
+    """
+
+    def __init__(self, paragraphs=40, latency=0.0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.paragraphs = paragraphs
+        self.server.latency = latency
+        self.server.lock = threading.Lock()
+        self.server.hits = 0
+        self.server.not_modified = 0
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def hits(self):
+        return self.server.hits
+
+    @property
+    def not_modified(self):
+        return self.server.not_modified
+
+    @property
+    def max_in_flight(self):
+        return self.server.max_in_flight
+
+    def url(self, title):
+        return f"{self.base_url}/wiki/{title.replace(' ', '_')}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
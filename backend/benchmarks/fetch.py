@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from benchmarks.fake_wikipedia import FakeWikipedia
+from benchmarks.load import percentile
+
+
+class CheckFailed(AssertionError):
+    """A fetch scenario ran but the scheduler or cache misbehaved."""
+
+
+def check(condition, message):
+    # Explicit raise so the checks still run under python -O
+    if not condition:
+        raise CheckFailed(message)
+
+
+def run_fetches(name, urls, concurrency, max_age=None):
+    """
+    Calls fetch_page() for every URL over `concurrency` threads with
+    whatever scheduler and cache are installed; reports like a load scenario.
+    """
+    from services.fetcher import fetch_page
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(url):
+        start = time.perf_counter()
+        try:
+            fetch_page(url, max_age=max_age)
+            error = None
+        except Exception as e:
+            error = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if error:
+                errors.append(error)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        wall_start = time.perf_counter()
+        list(executor.map(one, urls))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        'name': name,
+        'kind': 'load',
+        'unit': 'seconds/request',
+        'requests': len(urls),
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'error_codes': sorted(set(errors)),
+        'throughput_rps': len(urls) / wall if wall else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+def installed(scheduler=None, cache=None):
+    """Swaps the process-wide fetch scheduler and page cache for a scenario."""
+    from services import fetcher
+    from services.fetcher import HostScheduler
+    if scheduler is None:
+        scheduler = HostScheduler(concurrency=64, rate=0, max_wait=30)
+    return mock.patch.multiple(fetcher, _scheduler=scheduler, _cache=cache)
+
+
+def bench_paced(requests, concurrency):
+    """More callers than slots: the scheduler must cap in-flight requests per host."""
+    from services.fetcher import HostScheduler
+    scheduler = HostScheduler(concurrency=2, rate=50, max_wait=30)
+    with FakeWikipedia(paragraphs=5, latency=0.1) as wiki, installed(scheduler):
+        urls = [wiki.url(f"Paced {i}") for i in range(requests)]
+        result = run_fetches('fetch.paced', urls, max(concurrency, 8))
+        result['max_in_flight'] = wiki.max_in_flight
+
+    check(result['errors'] == 0, f"fetch.paced: {result['error_codes']}")
+    check(wiki.max_in_flight <= 2, f"fetch.paced: {wiki.max_in_flight} requests in flight, limit is 2")
+    return result
+
+
+def bench_revalidate(requests, concurrency):
+    """max_age=0 refetches of cached pages must be conditional and come back 304."""
+    from services.fetcher import PageCache
+    with tempfile.TemporaryDirectory() as directory, FakeWikipedia(paragraphs=40) as wiki:
+        cache = PageCache(directory, max_bytes=64 * 1024 * 1024)
+        with installed(cache=cache):
+            urls = [wiki.url(f"Revalidate {i}") for i in range(requests)]
+            run_fetches('fetch.revalidate.warmup', urls, concurrency)
+            before = wiki.not_modified
+            result = run_fetches('fetch.revalidate', urls, concurrency, max_age=0)
+            result['not_modified'] = wiki.not_modified - before
+
+    check(result['errors'] == 0, f"fetch.revalidate: {result['error_codes']}")
+    check(result['not_modified'] >= requests,
+          f"fetch.revalidate: {result['not_modified']} of {requests} refetches were 304s")
+    return result
+
+
+def bench_evict(requests, concurrency):
+    """A cache smaller than the working set must evict to stay within its budget."""
+    from services.fetcher import PageCache
+    with tempfile.TemporaryDirectory() as directory, FakeWikipedia(paragraphs=40) as wiki:
+        cache = PageCache(directory, max_bytes=16 * 1024)
+        with installed(cache=cache):
+            urls = [wiki.url(f"Evict {i}") for i in range(requests)]
+            result = run_fetches('fetch.cache_evict', urls, concurrency)
+        stats = cache.snapshot()
+        result['evictions'] = stats['evictions']
+
+    check(result['errors'] == 0, f"fetch.cache_evict: {result['error_codes']}")
+    check(stats['evictions'] > 0, "fetch.cache_evict: nothing was evicted")
+    check(stats['bytes'] <= stats['max_bytes'],
+          f"fetch.cache_evict: {stats['bytes']} bytes cached, limit is {stats['max_bytes']}")
+    return result
+
+
+def run(requests=50, concurrency=4):
+    return [
+        bench_paced(requests, concurrency),
+        bench_revalidate(requests, concurrency),
+        bench_evict(requests, concurrency),
+    ]
@@ -0,0 +1,55 @@
+import random
+
+WORDS = (
+    "empire river science history king war city language music theory "
+    "population century culture trade mountain island church university "
+    "government economy army republic treaty festival railway harbour"
+).split()
+
+
+def make_paragraph(rng, sentences=5):
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        words[0] = words[0].capitalize()
+        out.append(" ".join(words) + ".")
+    # Reference markers that fetch_article strips
+    return " ".join(out) + f'<sup class="reference">[{rng.randint(1, 99)}]</sup>'
+
+
+def make_article_html(title, paragraphs=40, seed=0):
+    """Builds a Wikipedia-shaped page (firstHeading + mw-parser-output)."""
+    rng = random.Random(f"{title}:{seed}")
+    body = []
+    for i in range(paragraphs):
+        if i and i % 8 == 0:
+            body.append(f'<h2><span class="mw-headline">Section {i // 8}</span></h2>')
+        body.append(f"<p>{make_paragraph(rng)}</p>")
+        if i % 10 == 0:
+            body.append('<table class="infobox"><tr><td>noise</td></tr></table>')
+
+    return (
+        "<!DOCTYPE html><html><head><title>"
+        f"{title} - Wikipedia</title></head><body>"
+        f'<h1 id="firstHeading">{title}</h1>'
+        '<div id="mw-content-text"><div class="mw-parser-output">'
+        + "".join(body)
+        + "</div></div></body></html>"
+    )
+
+
+def make_questions(text, count=8, sections=0):
+    """Deterministic quiz payload shaped like QuizOutput.dict()."""
+    rng = random.Random(len(text))
+    questions = []
+    for i in range(count):
+        options = [f"{rng.choice(WORDS)} {i}-{j}" for j in range(4)]
+        questions.append({
+            "question": f"Question {i} about {rng.choice(WORDS)}?",
+            "options": options,
+            "correct_answer": options[i % 4],
+            "explanation": "The article says so.",
+            "difficulty": ("Easy", "Medium", "Hard")[i % 3],
+            "source_sections": [i % sections] if sections else [],
+        })
+    return {"questions": questions, "related_topics": ["Topic A", "Topic B", "Topic C"]}
@@ -0,0 +1,130 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class ClientPool:
+    """One logged-in BenchClient per worker thread."""
+
+    def __init__(self, app):
+        from benchmarks.env import BenchClient
+        self.app = app
+        self._local = threading.local()
+        self._ids = itertools.count()
+        self._factory = BenchClient
+
+    def get(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._factory(self.app, username=f"bench{next(self._ids)}")
+            self._local.client = client
+        return client
+
+
+def run_scenario(name, pool, request_func, requests, concurrency, expected=(200, 201)):
+    """
+    Fires `requests` calls of request_func(client, i) over `concurrency`
+    threads and reports latency percentiles and throughput.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(i):
+        client = pool.get()
+        start = time.perf_counter()
+        response = request_func(client, i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if response.status_code not in expected:
+                errors.append(response.status_code)
+
+    # Log every worker in up front so login cost is not measured
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: pool.get(), range(concurrency)))
+
+        wall_start = time.perf_counter()
+        list(executor.map(one, range(requests)))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        'name': name,
+        'kind': 'load',
+        'unit': 'seconds/request',
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'error_codes': sorted(set(errors)),
+        'throughput_rps': requests / wall if wall else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+def run(app, fake_wiki, fake_llm, requests=50, concurrency=4, library_size=50):
+    pool = ClientPool(app)
+    results = []
+    run_id = int(time.time())
+
+    # Cold: every request is a new article -> scrape + summary + quiz
+    def generate_cold(client, i):
+        return client.post('/api/generate', json={'url': fake_wiki.url(f"Cold {run_id} {i}")})
+
+    results.append(run_scenario('generate.cold', pool, generate_cold, requests, concurrency))
+
+    # Warm: the article and its quiz already exist
+    warm_url = fake_wiki.url(f"Warm {run_id}")
+    first = pool.get().post('/api/generate', json={'url': warm_url})
+    quiz_id = first.get_json()['quiz_id']
+
+    def generate_warm(client, i):
+        return client.post('/api/generate', json={'url': warm_url})
+
+    results.append(run_scenario('generate.warm', pool, generate_warm, requests, concurrency))
+
+    # Grow the library before measuring the list endpoint
+    seed_client = pool.get()
+    for i in range(library_size):
+        seed_client.post('/api/generate', json={'url': fake_wiki.url(f"Library {run_id} {i}")})
+
+    def list_quizzes(client, i):
+        return client.get('/api/quizzes')
+
+    results.append(run_scenario('quizzes.list', pool, list_quizzes, requests, concurrency))
+
+    answers = {str(i): 'wrong' for i in range(10)}
+
+    def submit(client, i):
+        return client.post(f'/api/quiz/{quiz_id}/submit', json={'answers': answers})
+
+    results.append(run_scenario('quiz.submit', pool, submit, requests, concurrency))
+
+    # Last: leaves the primary model marked as throttled for the router window.
+    # Every call to the primary model gets a 429; generation must keep
+    # succeeding on the fallback tier instead of tripping the circuit breaker.
+    from config import Config
+    fake_llm.exhausted_models.add(Config.GEMINI_MODEL)
+    try:
+        def generate_primary_exhausted(client, i):
+            return client.post('/api/generate', json={'url': fake_wiki.url(f"Exhausted {run_id} {i}")})
+
+        results.append(run_scenario('generate.cold.primary_exhausted', pool, generate_primary_exhausted,
+                                    requests, max(concurrency, 8)))
+    finally:
+        fake_llm.exhausted_models.discard(Config.GEMINI_MODEL)
+
+    return results
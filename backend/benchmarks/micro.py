@@ -0,0 +1,113 @@
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.fixtures import make_article_html, make_questions
+
+
+def measure(name, func, repeat=5, number=None, min_time=0.2):
+    """
+    timeit-style timer. Calibrates `number` so one round takes at least
+    `min_time`, then reports per-call stats over `repeat` rounds.
+    """
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+
+    return {
+        'name': name,
+        'kind': 'micro',
+        'unit': 'seconds/call',
+        'calls_per_round': number,
+        'rounds': repeat,
+        'min': min(rounds),
+        'median': statistics.median(rounds),
+        'stdev': statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+    }
+
+
+def bench_normalize_url():
+    from services.scraper import normalize_url
+    urls = [
+        'https://en.wikipedia.org/wiki/Alan_Turing',
+        'https://en.wikipedia.org/wiki/Alan_Turing?action=view#Early_life',
+        'https://de.wikipedia.org/wiki/K%C3%B6ln?uselang=en',
+    ]
+    return measure('normalize_url', lambda: [normalize_url(u) for u in urls])
+
+
+def bench_fetch_article_parse():
+    """fetch_article with the HTTP layer stubbed out: pure parse/clean cost."""
+    from services import scraper
+    html = make_article_html('Parsing Benchmark', paragraphs=120)
+    response = mock.Mock(text=html, status_code=200, headers={})
+    response.raise_for_status.return_value = None
+
+    with mock.patch('requests.get', return_value=response):
+        return measure('fetch_article.parse',
+                       lambda: scraper.fetch_article('https://en.wikipedia.org/wiki/Parsing_Benchmark'))
+
+
+def bench_fetch_article_http(fake_wiki):
+    """fetch_article against the local fake Wikipedia (HTTP + parse)."""
+    from services.scraper import fetch_article
+    url = fake_wiki.url('Http Benchmark')
+    return measure('fetch_article.http', lambda: fetch_article(url), repeat=3)
+
+
+def bench_page_cache_hit():
+    """PageCache lookup of a cached page (SQLite index + gunzip)."""
+    from services.fetcher import PageCache
+    url = 'https://en.wikipedia.org/wiki/Cache_Benchmark'
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PageCache(directory, max_bytes=64 * 1024 * 1024)
+        cache.put(url, make_article_html('Cache Benchmark', paragraphs=120), etag='"bench"')
+        return measure('page_cache.hit', lambda: cache.get(url))
+
+
+def bench_question_validation():
+    from services.ai_generator import Question, QuizOutput
+    payload = make_questions('x' * 5000, count=10)
+    # Case/whitespace mismatch exercises the auto-correct branch
+    sloppy = dict(payload['questions'][0])
+    sloppy['correct_answer'] = ' ' + sloppy['correct_answer'].upper() + ' '
+
+    results = [
+        measure('Question.validate', lambda: Question(**payload['questions'][1])),
+        measure('Question.validate.autocorrect', lambda: Question(**sloppy)),
+        measure('QuizOutput.validate', lambda: QuizOutput(**payload)),
+    ]
+    return results
+
+
+def bench_grade_answers():
+    from routes.main import grade_answers
+    questions = make_questions('y' * 3000, count=10)['questions']
+    answers = {str(i): q['options'][(i + 1) % 2] for i, q in enumerate(questions)}
+    return measure('submit_quiz.grade_answers', lambda: grade_answers(questions, answers))
+
+
+def run(fake_wiki):
+    results = [
+        bench_normalize_url(),
+        bench_fetch_article_parse(),
+        bench_fetch_article_http(fake_wiki),
+        bench_page_cache_hit(),
+        bench_grade_answers(),
+    ]
+    results.extend(bench_question_validation())
+    return results
@@ -0,0 +1,109 @@
+"""
+Offline benchmark runner.
+
+    python -m benchmarks.run                       # micro + load on SQLite
+    python -m benchmarks.run --suite micro
+    python -m benchmarks.run --suite startup          # import-time profile
+    python -m benchmarks.run --suite fetch            # fetch pacing / page cache checks
+    python -m benchmarks.run --db postgresql://...  # load against Postgres
+    python -m benchmarks.run --output before.json
+
+Results are written as JSON; compare two runs with benchmarks.compare.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks import env
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WikiQuiz backend benchmarks")
+    parser.add_argument('--suite', choices=['micro', 'load', 'startup', 'fetch', 'all'], default='all')
+    parser.add_argument('--db', help="Database URL (default: temporary SQLite file)")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per load scenario")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--library-size', type=int, default=50, help="Quizzes seeded before the list scenario")
+    parser.add_argument('--llm-latency', type=float, default=0.05, help="Fake LLM seconds per call")
+    parser.add_argument('--llm-429-rate', type=float, default=0.0, help="Fraction of fake LLM calls failing with 429")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<rev>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env.configure(args.db)
+
+    # Backend modules are only imported after env.configure()
+    from benchmarks.fake_llm import FakeLLM
+    from benchmarks.fake_wikipedia import FakeWikipedia
+    from benchmarks import micro, load, startup, fetch
+
+    fake_llm = FakeLLM(latency=args.llm_latency, quota_error_rate=args.llm_429_rate).install()
+    results = []
+
+    if args.suite in ('startup', 'all'):
+        # Subprocesses inherit the benchmark env set by env.configure()
+        results.extend(startup.run())
+
+    if args.suite in ('fetch', 'all'):
+        # Runs its own fake Wikipedia servers so their counters start at zero
+        results.extend(fetch.run(requests=args.requests, concurrency=args.concurrency))
+
+    with FakeWikipedia() as fake_wiki:
+        if args.suite in ('micro', 'all'):
+            results.extend(micro.run(fake_wiki))
+
+        if args.suite in ('load', 'all'):
+            app = env.create_app()
+            results.extend(load.run(
+                app, fake_wiki, fake_llm,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                library_size=args.library_size
+            ))
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'database': os.environ['DATABASE_URL'].split('://', 1)[0],
+        'params': vars(args),
+        'fake_llm': {'calls': fake_llm.calls, 'quota_errors': fake_llm.quota_errors},
+        'results': results,
+    }
+
+    output = args.output or os.path.join(os.path.dirname(__file__), 'results', f'{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        if r['kind'] == 'micro':
+            print(f"{r['name']:<32} median {r['median'] * 1e6:>12.1f} us")
+        elif r['kind'] == 'startup':
+            print(f"{r['name']:<32} median {r['median'] * 1e3:>12.1f} ms")
+        else:
+            print(f"{r['name']:<32} p50 {r['p50'] * 1e3:>8.1f} ms  p95 {r['p95'] * 1e3:>8.1f} ms  "
+                  f"{r['throughput_rps']:>8.1f} req/s  errors {r['errors']}")
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
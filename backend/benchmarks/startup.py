@@ -0,0 +1,62 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What a process has to import before it can do useful work
+TARGETS = {
+    'startup.app': 'import app',
+    'startup.auth_only': 'import routes.auth',
+    'startup.llm_stack': 'import services.ai_generator as g; g.get_parser(); g.get_llm()',
+}
+
+
+def _run(code, importtime=False):
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', code]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=os.environ.copy(), capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"`{code}` failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def top_imports(stderr, limit=15):
+    """Parses `python -X importtime` output into the slowest modules (cumulative)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        rows.append({
+            'module': module.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    rows.sort(key=lambda r: r['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+def measure(name, code, repeat=5):
+    # One warm-up run so .pyc compilation isn't counted
+    _run(code)
+    samples = [_run(code)[0] for _ in range(repeat)]
+    return {
+        'name': name,
+        'kind': 'startup',
+        'unit': 'seconds/process',
+        'rounds': repeat,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'top_imports': top_imports(_run(code, importtime=True)[1]),
+    }
+
+
+def run(repeat=5):
+    return [measure(name, code, repeat) for name, code in TARGETS.items()]
@@ -0,0 +1,111 @@
+import click
+from datetime import datetime, timedelta
+from models import db, Article
+
+
+def register_commands(app):
+
+    @app.cli.command('refresh-articles')
+    @click.option('--url', help="Refresh a single article by its (normalized) URL.")
+    @click.option('--older-than-days', type=int, default=30, show_default=True,
+                  help="Refresh articles not refreshed for this many days.")
+    @click.option('--limit', type=int, default=50, show_default=True)
+    def refresh_articles(url, older_than_days, limit):
+        """Re-fetch articles and regenerate only the questions whose sections changed."""
+        from services.refresher import refresh_article
+
+        if url:
+            articles = Article.query.filter_by(url=url).all()
+        else:
+            cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+            last_seen = db.func.coalesce(Article.refreshed_at, Article.created_at)
+            # Articles imported without a body (cleaned_text '') are always due
+            missing_body = Article.cleaned_text == ''
+            articles = Article.query.filter((last_seen < cutoff) | missing_body).order_by(
+                missing_body.desc(), last_seen.asc()
+            ).limit(limit).all()
+
+        for article in articles:
+            try:
+                result = refresh_article(article)
+                click.echo(f"{article.url}: {result['status']} {result}")
+            except Exception as e:
+                db.session.rollback()
+                click.echo(f"{article.url}: failed ({e})", err=True)
+
+    @app.cli.command('compact-stats')
+    @click.option('--rebuild', is_flag=True,
+                  help="Recompute all leaderboard aggregates from quiz_attempts first.")
+    def compact_stats(rebuild):
+        """Refresh trending scores and drop expired popularity buckets (run periodically)."""
+        from services.leaderboard import compact, rebuild as rebuild_aggregates
+
+        if rebuild:
+            click.echo(f"Rebuilt leaderboards for {rebuild_aggregates()} quiz/user pairs")
+        scored, deleted = compact()
+        click.echo(f"Scored {scored} trending articles, removed {deleted} expired buckets")
+
+    @app.cli.command('export-library')
+    @click.argument('output')
+    @click.option('--bodies', type=click.Choice(['all', 'text', 'none']), default='all', show_default=True,
+                  help="Article content to include: raw_html + cleaned_text, cleaned_text only, or none.")
+    @click.option('--with-attempts', is_flag=True, help="Also export quiz attempts (matched by username on import).")
+    @click.option('--batch-size', type=int, default=1000, show_default=True)
+    def export_library_command(output, bodies, with_attempts, batch_size):
+        """Stream the shared quiz library to NDJSON (gzip if OUTPUT ends in .gz, '-' for stdout)."""
+        from services.library_io import export_library
+
+        counts = export_library(output, bodies=bodies, include_attempts=with_attempts, batch_size=batch_size)
+        click.echo(f"Exported {counts['article']} articles, {counts['quiz']} quizzes, "
+                   f"{counts['attempt']} attempts", err=output == '-')
+
+    @app.cli.command('import-library')
+    @click.argument('source')
+    @click.option('--batch-size', type=int, default=1000, show_default=True)
+    def import_library_command(source, batch_size):
+        """Idempotently import an export-library file (upserts by article URL / id)."""
+        from services.library_io import import_library
+
+        counts = import_library(source, batch_size=batch_size)
+        click.echo(f"Imported {counts['article']} articles, {counts['quiz']} quizzes, "
+                   f"{counts['attempt']} attempts ({counts['skipped']} skipped)")
+        if counts['attempt']:
+            click.echo("Run `flask compact-stats --rebuild` to refresh leaderboards.")
+
+    @app.cli.command('usage-report')
+    @click.option('--days', type=int, default=1, show_default=True)
+    @click.option('--top', type=int, default=20, show_default=True)
+    def usage_report(days, top):
+        """Heaviest users of quota-charged endpoints (generate/refresh/remix)."""
+        from models import GenerateUsage, User
+
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        tokens = db.func.sum(GenerateUsage.tokens_spent)
+        rows = db.session.query(
+            User.username,
+            db.func.sum(GenerateUsage.generations),
+            db.func.sum(GenerateUsage.cache_hits),
+            db.func.sum(GenerateUsage.throttled),
+            tokens
+        ).join(User, User.id == GenerateUsage.user_id).filter(
+            GenerateUsage.day >= since
+        ).group_by(User.username).order_by(tokens.desc()).limit(top).all()
+
+        for username, generations, cache_hits, throttled, spent in rows:
+            click.echo(f"{username}: {spent} tokens, {generations} generations, "
+                       f"{cache_hits} cache hits, {throttled} throttled")
+
+    @app.cli.command('page-cache')
+    @click.option('--clear', is_flag=True, help="Delete every cached page.")
+    def page_cache(clear):
+        """Show (or clear) the on-disk Wikipedia page cache."""
+        from services.fetcher import get_cache
+
+        cache = get_cache()
+        if cache is None:
+            click.echo("Page cache is disabled (FETCH_CACHE_MAX_BYTES=0)")
+            return
+        if clear:
+            click.echo(f"Removed {cache.clear()} cached pages")
+        stats = cache.snapshot()
+        click.echo(f"{stats['entries']} pages, {stats['bytes']} / {stats['max_bytes']} bytes in {stats['directory']}")
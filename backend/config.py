@@ -12,6 +12,26 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Optional read replica; read-only endpoints are routed here when set.
+    # Reads may lag the primary by the replication delay.
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+
+    # Engine / pool tuning (ignored for SQLite)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds
+    # Per-statement timeout in ms for PostgreSQL request traffic (0 = no limit);
+    # CLI commands (migrations, rebuilds, imports) run without one
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '15000'))
+
+    # ======================
+    # JSON Responses
+    # ======================
+    # Stream list endpoints as chunked JSON arrays instead of building them in memory
+    JSON_STREAM_LISTS = os.getenv('JSON_STREAM_LISTS', 'false').lower() == 'true'
+    JSON_STREAM_CHUNK_ROWS = int(os.getenv('JSON_STREAM_CHUNK_ROWS', '500'))
+
     # ======================
     # Third-party APIs
     # ======================
@@ -48,9 +68,125 @@ class Config:
     # JWT_COOKIE_SECURE = os.getenv('FLASK_ENV') == 'production'
     JWT_COOKIE_SECURE = True
     JWT_COOKIE_SAMESITE = 'None'
-    
+
+    # ======================
+    # Password Hashing
+    # ======================
+    # Werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:1000000'.
+    # Changing it re-hashes existing passwords transparently on next login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', '16'))
+
+    # Hashing runs in a separate process pool so it never holds the GIL of
+    # request threads. 0 workers = hash inline (handy for local dev).
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    # Max hash jobs queued or running at once; extra requests get a 503.
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+
+    # ======================
+    # Reverse Proxy
+    # ======================
+    # Number of trusted proxies (Nginx, Render, ...) in front of the app.
+    # When set, the client address is taken from X-Forwarded-For so per-IP
+    # limits see real clients instead of the proxy. Leave 0 when the app is
+    # reachable directly, or clients could spoof the header.
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', '0'))
+    PROXY_FIX_X_PROTO = int(os.getenv('PROXY_FIX_X_PROTO', '0'))
+
+    # ======================
+    # Login Throttling
+    # ======================
+    # Token buckets: CAPACITY attempts burst, refilled at RATE tokens/second.
+    # Shared across workers when RATE_LIMIT_STORAGE_URL is set (see below).
+    LOGIN_RATE_IP_CAPACITY = int(os.getenv('LOGIN_RATE_IP_CAPACITY', '20'))
+    LOGIN_RATE_IP_PER_SEC = float(os.getenv('LOGIN_RATE_IP_PER_SEC', '0.2'))
+    LOGIN_RATE_USER_CAPACITY = int(os.getenv('LOGIN_RATE_USER_CAPACITY', '5'))
+    LOGIN_RATE_USER_PER_SEC = float(os.getenv('LOGIN_RATE_USER_PER_SEC', '0.05'))
+
+    # ======================
+    # Generate Quotas
+    # ======================
+    # Token buckets shared by all workers when RATE_LIMIT_STORAGE_URL points
+    # at Redis (redis://...); per-process otherwise.
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL')
+    # Cost in tokens: quizzes already in the library are cheap, anything that
+    # scrapes or calls Gemini is expensive.
+    GENERATE_COST_CACHED = int(os.getenv('GENERATE_COST_CACHED', '1'))
+    GENERATE_COST_COLD = int(os.getenv('GENERATE_COST_COLD', '5'))
+    GENERATE_USER_CAPACITY = int(os.getenv('GENERATE_USER_CAPACITY', '30'))
+    GENERATE_USER_PER_SEC = float(os.getenv('GENERATE_USER_PER_SEC', '0.02'))
+    # Protects the Gemini key pool; only cold generations draw from it. Keep
+    # it several times the user capacity so one user can't drain it alone.
+    GENERATE_GLOBAL_CAPACITY = int(os.getenv('GENERATE_GLOBAL_CAPACITY', '150'))
+    GENERATE_GLOBAL_PER_SEC = float(os.getenv('GENERATE_GLOBAL_PER_SEC', '0.5'))
+
     # ======================
     # AI / LLM
     # ======================
     GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash-lite')
 
+    # Model tiers: summaries and short articles go to the fast model, long
+    # quizzes to GEMINI_MODEL; the fallback takes over when a model's quota
+    # is exhausted across the key pool. Unset tiers default to GEMINI_MODEL.
+    GEMINI_MODEL_FAST = os.getenv('GEMINI_MODEL_FAST', GEMINI_MODEL)
+    GEMINI_MODEL_FALLBACK = os.getenv('GEMINI_MODEL_FALLBACK')
+    LLM_SHORT_ARTICLE_CHARS = int(os.getenv('LLM_SHORT_ARTICLE_CHARS', '8000'))
+    # Share of keys recently rate-limited on a model before routing away from it
+    LLM_PRESSURE_THRESHOLD = float(os.getenv('LLM_PRESSURE_THRESHOLD', '0.5'))
+    LLM_PRESSURE_WINDOW_SECONDS = float(os.getenv('LLM_PRESSURE_WINDOW_SECONDS', '60'))
+
+    # Retry policy: total budget per LLM call and per-request timeout
+    LLM_CALL_DEADLINE_SECONDS = float(os.getenv('LLM_CALL_DEADLINE_SECONDS', '90'))
+    LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv('LLM_REQUEST_TIMEOUT_SECONDS', '60'))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', '0.5'))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', '8'))
+    LLM_PARSE_RETRIES = int(os.getenv('LLM_PARSE_RETRIES', '1'))
+
+    # Circuit breaker: open after N consecutive upstream failures, probe after the reset time
+    LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+
+    # ======================
+    # Wikipedia Fetching
+    # ======================
+    # Politeness: per host, at most N requests in flight and RATE requests/second
+    # (per process). Callers wait up to MAX_WAIT for a slot, then fail.
+    FETCH_MAX_CONCURRENCY_PER_HOST = int(os.getenv('FETCH_MAX_CONCURRENCY_PER_HOST', '2'))
+    FETCH_RATE_PER_HOST = float(os.getenv('FETCH_RATE_PER_HOST', '5'))
+    FETCH_MAX_WAIT_SECONDS = float(os.getenv('FETCH_MAX_WAIT_SECONDS', '30'))
+    FETCH_TIMEOUT_SECONDS = float(os.getenv('FETCH_TIMEOUT_SECONDS', '10'))
+
+    # On-disk page cache, LRU-evicted above MAX_BYTES (0 disables it).
+    # Pages younger than TTL are served without a request; older ones are
+    # revalidated with If-None-Match / If-Modified-Since.
+    FETCH_CACHE_DIR = os.getenv(
+        'FETCH_CACHE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'page_cache')
+    )
+    FETCH_CACHE_MAX_BYTES = int(os.getenv('FETCH_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+    FETCH_CACHE_TTL_SECONDS = int(os.getenv('FETCH_CACHE_TTL_SECONDS', '86400'))
+
+    # ======================
+    # Article Refresh
+    # ======================
+    # Regenerate the summary only when at least this share of the text changed
+    REFRESH_SUMMARY_THRESHOLD = float(os.getenv('REFRESH_SUMMARY_THRESHOLD', '0.2'))
+
+    # ======================
+    # Leaderboards / Trending
+    # ======================
+    POPULARITY_BUCKET_SECONDS = int(os.getenv('POPULARITY_BUCKET_SECONDS', '3600'))
+    TRENDING_WINDOW_HOURS = int(os.getenv('TRENDING_WINDOW_HOURS', '72'))
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+    LEADERBOARD_PAGE_SIZE = int(os.getenv('LEADERBOARD_PAGE_SIZE', '20'))
+
+    # ======================
+    # Question Bank
+    # ======================
+    # MinHash similarity at or above which a question counts as a duplicate
+    QUESTION_BANK_SIMILARITY = float(os.getenv('QUESTION_BANK_SIMILARITY', '0.7'))
+    # Generate more questions when the bank holds fewer than RATIO * requested
+    QUESTION_BANK_MIN_RATIO = float(os.getenv('QUESTION_BANK_MIN_RATIO', '1.5'))
+    QUESTION_BANK_DEFAULT_COUNT = int(os.getenv('QUESTION_BANK_DEFAULT_COUNT', '10'))
+    QUESTION_BANK_MAX_COUNT = int(os.getenv('QUESTION_BANK_MAX_COUNT', '20'))
+
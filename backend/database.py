@@ -1,6 +1,95 @@
+from functools import wraps
+from flask import g, has_app_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    """
+    Sends reads to the replica engine when the current request is marked
+    with @read_replica. Flushes (writes) always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_requested():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_requested():
+    return has_app_context() and g.get('use_replica', False)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def read_replica(f):
+    """Marks a view as read-only so its queries may be served by the replica."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def upsert(model):
+    """INSERT statement supporting .on_conflict_do_update() for the model's database."""
+    dialect = db.session.get_bind(model).dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts not supported on {dialect}")
+
+
+def build_engine_options(app, url):
+    """Pool options for the given database URL."""
+    if not url or make_url(url).get_backend_name() == 'sqlite':
+        # SQLite uses its own pool classes that reject these arguments
+        return {}
+
+    return {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_pre_ping': app.config['DB_POOL_PRE_PING'],
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+    }
+
+
+def _limit_request_statements(engine, timeout):
+    """
+    Caps statement time for transactions started while serving a request.
+    CLI work on the same engine (migrations, rebuilds, imports) runs
+    without a limit.
+    """
+    @event.listens_for(engine, 'begin')
+    def set_statement_timeout(conn):
+        if has_request_context():
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
 
-db = SQLAlchemy()
 
 def init_db(app):
+    primary_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app, primary_url))
+
+    replica_url = app.config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[REPLICA_BIND] = {'url': replica_url, **build_engine_options(app, replica_url)}
+        app.config['SQLALCHEMY_BINDS'] = binds
+
     db.init_app(app)
+
+    timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+    if timeout:
+        with app.app_context():
+            for engine in db.engines.values():
+                if engine.dialect.name == 'postgresql':
+                    _limit_request_statements(engine, timeout)
@@ -0,0 +1,37 @@
+"""quiz_versions_article_refresh
+
+Revision ID: 4b7e2d91a3c5
+Revises: 1c82fa13c2f9
+Create Date: 2026-10-19 10:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d91a3c5'
+down_revision = '1c82fa13c2f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('refreshed_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+        batch_op.add_column(sa.Column('is_current', sa.Boolean(), server_default=sa.true(), nullable=False))
+        batch_op.create_index('uq_quizzes_article_current', ['article_id'], unique=True,
+                              postgresql_where=sa.text('is_current'), sqlite_where=sa.text('is_current'))
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_index('uq_quizzes_article_current')
+        batch_op.drop_column('is_current')
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('refreshed_at')
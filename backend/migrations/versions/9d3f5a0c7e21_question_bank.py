@@ -0,0 +1,40 @@
+"""question_bank
+
+Revision ID: 9d3f5a0c7e21
+Revises: 4b7e2d91a3c5
+Create Date: 2026-10-19 11:40:02.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '9d3f5a0c7e21'
+down_revision = '4b7e2d91a3c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_bank',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('article_id', sa.String(length=36), nullable=False),
+    sa.Column('difficulty', sa.String(length=16), nullable=False),
+    sa.Column('fingerprint', sa.String(length=16), nullable=False),
+    sa.Column('minhash', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('article_id', 'fingerprint', name='uq_question_bank_article_fingerprint')
+    )
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_question_bank_article_id'), ['article_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question_bank', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_bank_article_id'))
+
+    op.drop_table('question_bank')
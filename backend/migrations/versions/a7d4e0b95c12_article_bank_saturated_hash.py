@@ -0,0 +1,26 @@
+"""article_bank_saturated_hash
+
+Revision ID: a7d4e0b95c12
+Revises: e2f7c4a9b618
+Create Date: 2026-10-20 10:12:48.553190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e0b95c12'
+down_revision = 'e2f7c4a9b618'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bank_saturated_hash', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('bank_saturated_hash')
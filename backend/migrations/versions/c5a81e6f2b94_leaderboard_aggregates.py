@@ -0,0 +1,72 @@
+"""leaderboard_aggregates
+
+Revision ID: c5a81e6f2b94
+Revises: 9d3f5a0c7e21
+Create Date: 2026-10-19 14:02:17.904412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a81e6f2b94'
+down_revision = '9d3f5a0c7e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_stats',
+    sa.Column('quiz_id', sa.String(length=36), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.BigInteger(), nullable=False),
+    sa.Column('total_questions_sum', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.PrimaryKeyConstraint('quiz_id')
+    )
+    op.create_table('quiz_user_best',
+    sa.Column('quiz_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('best_score', sa.Integer(), nullable=False),
+    sa.Column('total_questions', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('achieved_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('quiz_id', 'user_id')
+    )
+    with op.batch_alter_table('quiz_user_best', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_user_best_ranking', ['quiz_id', sa.text('best_score DESC'), 'achieved_at', 'user_id'], unique=False)
+
+    op.create_table('article_popularity',
+    sa.Column('article_id', sa.String(length=36), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ),
+    sa.PrimaryKeyConstraint('article_id', 'bucket_start')
+    )
+    op.create_table('trending_articles',
+    sa.Column('article_id', sa.String(length=36), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('recent_attempts', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ),
+    sa.PrimaryKeyConstraint('article_id')
+    )
+    with op.batch_alter_table('trending_articles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_trending_articles_score'), ['score'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('trending_articles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_trending_articles_score'))
+
+    op.drop_table('trending_articles')
+    op.drop_table('article_popularity')
+    with op.batch_alter_table('quiz_user_best', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_user_best_ranking')
+
+    op.drop_table('quiz_user_best')
+    op.drop_table('quiz_stats')
@@ -0,0 +1,33 @@
+"""generate_usage
+
+Revision ID: e2f7c4a9b618
+Revises: c5a81e6f2b94
+Create Date: 2026-10-19 16:41:05.218337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f7c4a9b618'
+down_revision = 'c5a81e6f2b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('generate_usage',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('cache_hits', sa.Integer(), nullable=False),
+    sa.Column('generations', sa.Integer(), nullable=False),
+    sa.Column('tokens_spent', sa.Integer(), nullable=False),
+    sa.Column('throttled', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+
+def downgrade():
+    op.drop_table('generate_usage')
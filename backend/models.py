@@ -15,6 +15,10 @@ class Article(db.Model):
     raw_html = db.Column(db.Text, nullable=False)
     cleaned_text = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+    # Fingerprint of cleaned_text at which question-bank top-ups stopped
+    # yielding new questions; no more top-ups until the text changes
+    bank_saturated_hash = db.Column(db.String(16), nullable=True)
     
     quizzes = db.relationship('Quiz', backref='article', lazy=True)
 
@@ -26,9 +30,34 @@ class Quiz(db.Model):
     summary = db.Column(db.Text, nullable=False)
     questions = db.Column(JSONB, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Refreshing an article creates a new version; older versions are kept
+    # (is_current=False) so existing attempts still point at their questions.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    is_current = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
     
     attempts = db.relationship('QuizAttempt', backref='quiz', lazy=True)
 
+    __table_args__ = (
+        # At most one current quiz per article; also serves "current quiz of article X"
+        db.Index('uq_quizzes_article_current', 'article_id', unique=True,
+                 postgresql_where=db.text('is_current'), sqlite_where=db.text('is_current')),
+    )
+
+class BankQuestion(db.Model):
+    # Per-article pool of validated questions accumulated across generations
+    __tablename__ = 'question_bank'
+    __table_args__ = (
+        db.UniqueConstraint('article_id', 'fingerprint', name='uq_question_bank_article_fingerprint'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=generate_uuid)
+    article_id = db.Column(db.String(36), db.ForeignKey('articles.id'), nullable=False, index=True)
+    difficulty = db.Column(db.String(16), nullable=False)
+    fingerprint = db.Column(db.String(16), nullable=False)  # hash of the normalized text
+    minhash = db.Column(JSONB, nullable=False)  # signature for near-duplicate detection
+    data = db.Column(JSONB, nullable=False)  # question dict as stored in Quiz.questions
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -50,3 +79,56 @@ class QuizAttempt(db.Model):
     total_questions = db.Column(db.Integer, nullable=False)
     answers = db.Column(JSONB, nullable=False)
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- Materialized aggregates (maintained in submit_quiz / flask compact-stats) ---
+
+class QuizStats(db.Model):
+    __tablename__ = 'quiz_stats'
+
+    quiz_id = db.Column(db.String(36), db.ForeignKey('quizzes.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    total_questions_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class QuizUserBest(db.Model):
+    __tablename__ = 'quiz_user_best'
+    __table_args__ = (
+        # Serves leaderboard pages straight from the index
+        db.Index('ix_quiz_user_best_ranking', 'quiz_id', db.desc('best_score'), 'achieved_at', 'user_id'),
+    )
+
+    quiz_id = db.Column(db.String(36), db.ForeignKey('quizzes.id'), primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    best_score = db.Column(db.Integer, nullable=False)
+    total_questions = db.Column(db.Integer, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=1)
+    achieved_at = db.Column(db.DateTime, nullable=False)
+
+class ArticlePopularity(db.Model):
+    # Attempts per article per time bucket (all quiz versions and remixes)
+    __tablename__ = 'article_popularity'
+
+    article_id = db.Column(db.String(36), db.ForeignKey('articles.id'), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+class TrendingArticle(db.Model):
+    # Decayed popularity score, recomputed by the compaction job
+    __tablename__ = 'trending_articles'
+
+    article_id = db.Column(db.String(36), db.ForeignKey('articles.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, index=True)
+    recent_attempts = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+class GenerateUsage(db.Model):
+    # Per-user daily counters for quota-charged endpoints (generate/refresh/remix)
+    __tablename__ = 'generate_usage'
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    cache_hits = db.Column(db.Integer, nullable=False, default=0)
+    generations = db.Column(db.Integer, nullable=False, default=0)
+    tokens_spent = db.Column(db.Integer, nullable=False, default=0)
+    throttled = db.Column(db.Integer, nullable=False, default=0)
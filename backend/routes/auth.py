@@ -1,11 +1,27 @@
 from flask import Blueprint, request, jsonify
 from models import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from services.passwords import hash_password, verify_password, needs_rehash, PasswordHasherBusy
+from services.rate_limiter import create_limiter
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, set_access_cookies, set_refresh_cookies, unset_jwt_cookies, get_csrf_token
 from email_validator import validate_email, EmailNotValidError
 
 auth_bp = Blueprint('auth', __name__)
 
+# Login throttling (checked before any DB or hash work; shared across
+# workers when RATE_LIMIT_STORAGE_URL is set)
+login_ip_limiter = create_limiter(
+    'login-ip', Config.LOGIN_RATE_IP_CAPACITY, Config.LOGIN_RATE_IP_PER_SEC, Config.RATE_LIMIT_STORAGE_URL
+)
+login_user_limiter = create_limiter(
+    'login-user', Config.LOGIN_RATE_USER_CAPACITY, Config.LOGIN_RATE_USER_PER_SEC, Config.RATE_LIMIT_STORAGE_URL
+)
+
+def too_many_requests(retry_after):
+    response = jsonify({"error": "Too many login attempts. Please try again later."})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
 @auth_bp.route('/api/auth/register', methods=['POST'])
 def register():
     data = request.json
@@ -35,10 +51,15 @@ def register():
     if User.query.filter((User.username == username) | (User.email == email)).first():
         return jsonify({"error": "User already exists"}), 409
 
+    try:
+        password_hash = hash_password(password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
     new_user = User(
         username=username,
         email=email,
-        password_hash=generate_password_hash(password)
+        password_hash=password_hash
     )
     
     db.session.add(new_user)
@@ -55,11 +76,36 @@ def login():
     if not username or not password:
          return jsonify({"error": "Missing credentials"}), 400
 
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({"error": "Invalid credentials format"}), 400
+
+    # Throttle per client IP and per target username
+    allowed, retry_after = login_ip_limiter.consume(request.remote_addr or 'unknown')
+    if not allowed:
+        return too_many_requests(retry_after)
+
+    allowed, retry_after = login_user_limiter.consume(username.lower())
+    if not allowed:
+        return too_many_requests(retry_after)
+
     user = User.query.filter_by(username=username).first()
-    
-    if not user or not check_password_hash(user.password_hash, password):
+
+    try:
+        valid = user is not None and verify_password(user.password_hash, password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, please retry"}), 503
+
+    if not valid:
         return jsonify({"error": "Invalid credentials"}), 401
 
+    # Upgrade the stored hash if the configured parameters changed
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = hash_password(password)
+            db.session.commit()
+        except PasswordHasherBusy:
+            pass  # Not critical; we'll try again on the next login
+
     # Security: Ensure identity is always a string to avoid type confusion 
     # and potential bypasses in some JWT implementations
     identity_str = str(user.id)
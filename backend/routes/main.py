@@ -1,15 +1,52 @@
 from flask import Blueprint, request, jsonify
-from models import db, Article, Quiz, QuizAttempt, User
+from models import db, Article, Quiz, QuizAttempt, User, QuizStats, TrendingArticle
+from database import read_replica
+from serialization import json_list_response
 from services.scraper import normalize_url, fetch_article
-from services.ai_generator import generate_summary, generate_quiz
+from services.fetcher import get_fetch_stats
+from services.ai_generator import generate_summary, generate_quiz, get_llm_stats, llm_breaker, LLMError, ERROR_QUOTA, ERROR_TRANSIENT
+from services.circuit_breaker import CircuitOpenError
+from services.sections import split_sections, tag_questions
+from services.refresher import refresh_article, fill_missing_body
+from services.question_bank import add_to_bank, usable_questions, is_low, is_saturated, mark_saturated, assemble_questions
+from config import Config
+from services.leaderboard import record_attempt, leaderboard_page
+from services.quota import charge, usage_summary, KIND_CACHED, KIND_COLD, SCOPE_GLOBAL
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload, load_only
 import concurrent.futures
-import validators
+import math
 
 main_bp = Blueprint('main', __name__)
 
+def quota_exceeded(retry_after, scope):
+    if scope == SCOPE_GLOBAL:
+        message = "Quiz generation is busy right now. Please try again shortly."
+    else:
+        message = "Generation quota exceeded. Please try again later."
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def llm_unavailable(error):
+    # Gemini is down, out of quota or returned garbage: say so instead of a generic 500
+    if isinstance(error, CircuitOpenError):
+        retry_after = llm_breaker.snapshot()['retry_in_seconds'] or 1
+    elif error.kind == ERROR_QUOTA:
+        retry_after = Config.LLM_PRESSURE_WINDOW_SECONDS
+    elif error.kind == ERROR_TRANSIENT:
+        retry_after = Config.LLM_BREAKER_RESET_SECONDS
+    else:
+        return jsonify({"error": "The AI service returned an unusable response. Please try again."}), 502
+
+    retry_after = max(1, math.ceil(retry_after))
+    response = jsonify({"error": "Quiz generation is temporarily unavailable. Please try again shortly.",
+                        "retry_after": retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
 @main_bp.route('/api/generate', methods=['POST'])
 @jwt_required()
 def generate_quiz_route():
@@ -19,14 +56,22 @@ def generate_quiz_route():
         return jsonify({"error": "URL is required"}), 400
 
     # Security: Validate URL format
+    import validators
     if not validators.url(url):
         return jsonify({"error": "Invalid URL format"}), 400
 
+    usage = None
     try:
         normalized_url = normalize_url(url)
         
-        # Check if article exists
+        # Check if article and quiz exist (SHARED)
         article = Article.query.filter_by(url=normalized_url).first()
+        quiz = Quiz.query.filter_by(article_id=article.id, is_current=True).first() if article else None
+
+        # Library hits are cheap; scraping + generation draws on the shared key pool
+        usage = charge(get_jwt_identity(), KIND_CACHED if quiz else KIND_COLD)
+        if not usage.allowed:
+            return quota_exceeded(usage.retry_after, usage.scope)
         
         if not article:
             # Scrape
@@ -39,11 +84,19 @@ def generate_quiz_route():
                 raw_html=raw_html,
                 cleaned_text=cleaned_text
             )
-            db.session.add(article)
-            db.session.commit()
-        
-        # Check if quiz exists for this article (SHARED)
-        quiz = Quiz.query.filter_by(article_id=article.id).first()
+            try:
+                db.session.add(article)
+                db.session.commit()
+            except IntegrityError:
+                # Scraped concurrently by another request: use the stored copy
+                db.session.rollback()
+                article = Article.query.filter_by(url=normalized_url).first()
+                if article is None:
+                    raise
+                quiz = Quiz.query.filter_by(article_id=article.id, is_current=True).first()
+        elif not quiz:
+            # Imported without a body: fetch it before generating from it
+            fill_missing_body(article)
         
         if not quiz:
             # Generate AI Content in Parallel
@@ -53,16 +106,26 @@ def generate_quiz_route():
                 
                 summary = summary_future.result()
                 quiz_data = quiz_future.result()
+
+            # Remember which sections each question came from (for refreshes)
+            tag_questions(quiz_data, split_sections(article.cleaned_text))
             
             quiz = Quiz(
                 article_id=article.id,
                 summary=summary,
                 questions=quiz_data
             )
-            db.session.add(quiz)
-            db.session.commit()
-            
-            
+            try:
+                db.session.add(quiz)
+                db.session.flush()
+                add_to_bank(article.id, quiz_data.get('questions', []))
+                db.session.commit()
+            except IntegrityError:
+                # A concurrent request stored this article's quiz first: serve that one
+                db.session.rollback()
+                quiz = Quiz.query.filter_by(article_id=article.id, is_current=True).first()
+                if quiz is None:
+                    raise
             
         # Strip correct answers for the client
         questions_clean = []
@@ -73,31 +136,45 @@ def generate_quiz_route():
                 "difficulty": q.get('difficulty', 'Unknown'),
             })
 
-        return jsonify({
+        response = jsonify({
             "message": "Quiz ready",
             "quiz_id": quiz.id,
             "title": article.title,
             "summary": quiz.summary,
             "questions": questions_clean
-        }), 201
+        })
+        usage.settle()
+        return response, 201
 
+    except (LLMError, CircuitOpenError) as e:
+        db.session.rollback()
+        if usage:
+            usage.refund()
+        return llm_unavailable(e)
     except Exception as e:
+        db.session.rollback()
+        if usage:
+            usage.refund()
         return jsonify({"error": str(e)}), 500
 
 @main_bp.route('/api/quizzes', methods=['GET'])
 @jwt_required()
+@read_replica
 def list_quizzes():
     # List ALL persistent Quizzes (Shared Library)
     sort_by = request.args.get('sort_by', 'date')
     order = request.args.get('order', 'desc')
 
-    query = Quiz.query.options(
-        joinedload(Quiz.article).load_only(Article.title, Article.url)
-    )
+    # Plain column tuples: no ORM objects to build for a potentially large list
+    query = db.session.query(
+        Quiz.id.label('id'),
+        Article.title.label('title'),
+        Article.url.label('url'),
+        Quiz.summary.label('summary'),
+        Quiz.created_at.label('created_at')
+    ).join(Article, Quiz.article_id == Article.id).filter(Quiz.is_current.is_(True))
 
     if sort_by == 'title':
-        # Must join to sort by related field
-        query = query.join(Article)
         if order == 'asc':
             query = query.order_by(Article.title.asc())
         else:
@@ -109,45 +186,154 @@ def list_quizzes():
         else:
             query = query.order_by(Quiz.created_at.desc())
 
-    quizzes = query.all()
-    
-    results = []
-    for q in quizzes:
-        results.append({
-            "id": q.id,
-            "title": q.article.title,
-            "url": q.article.url,
-            "summary": q.summary,
-            "created_at": q.created_at.isoformat()
-        })
-    return jsonify(results), 200
+    return json_list_response(query), 200
+
+@main_bp.route('/api/quiz/<quiz_id>/refresh', methods=['POST'])
+@jwt_required()
+def refresh_quiz(quiz_id):
+    # Re-fetch the source article; only questions from changed sections are regenerated
+    quiz = Quiz.query.get_or_404(quiz_id)
+
+    usage = charge(get_jwt_identity(), KIND_COLD)
+    if not usage.allowed:
+        return quota_exceeded(usage.retry_after, usage.scope)
+
+    try:
+        result = refresh_article(quiz.article)
+    except (LLMError, CircuitOpenError) as e:
+        db.session.rollback()
+        usage.refund()
+        return llm_unavailable(e)
+    except Exception as e:
+        db.session.rollback()
+        usage.refund()
+        return jsonify({"error": str(e)}), 500
+
+    if result['status'] == 'conflict':
+        usage.refund()
+        return jsonify({"error": "Quiz is already being refreshed"}), 409
+
+    # Only refreshes that regenerated something cost a cold generation
+    if not result.get('llm_used'):
+        usage.downgrade()
+    usage.settle()
+    return jsonify(result), 200
+
+@main_bp.route('/api/quiz/<quiz_id>/remix', methods=['POST'])
+@jwt_required()
+def remix_quiz(quiz_id):
+    # Fresh quiz for the same article, assembled from its question bank.
+    # The LLM is only called when the bank runs low.
+    base = Quiz.query.get_or_404(quiz_id)
+    article = base.article
+    data = request.get_json(silent=True) or {}
+
+    try:
+        count = int(data.get('count', Config.QUESTION_BANK_DEFAULT_COUNT))
+    except (TypeError, ValueError):
+        return jsonify({"error": "count must be a number"}), 400
+    count = max(1, min(count, Config.QUESTION_BANK_MAX_COUNT))
+
+    usage = charge(get_jwt_identity(), KIND_CACHED)
+    if not usage.allowed:
+        return quota_exceeded(usage.retry_after, usage.scope)
+
+    top_up_error = None
+    try:
+        # Imported without a body: every question would look stale
+        fill_missing_body(article)
+        available = usable_questions(article)
+        if not available:
+            # Quizzes generated before the bank existed
+            add_to_bank(article.id, base.questions.get('questions', []))
+            db.session.commit()
+            available = usable_questions(article)
+
+        # Top-ups are best effort and billed as a cold generation: skipped when
+        # the user or the key pool can't pay, and for good once they stop
+        # producing new questions for this text
+        if is_low(len(available), count) and not is_saturated(article) and usage.upgrade():
+            try:
+                quiz_data = generate_quiz(article.cleaned_text)
+                tag_questions(quiz_data, split_sections(article.cleaned_text))
+                added = add_to_bank(article.id, quiz_data.get('questions', []))
+                available = usable_questions(article)
+                if not added or is_low(len(available), count):
+                    mark_saturated(article)
+                db.session.commit()
+            except Exception as e:
+                # Serve what the bank has rather than failing
+                db.session.rollback()
+                usage.downgrade()
+                print(f"Question bank top-up failed: {e}")
+                top_up_error = e
+
+        questions = assemble_questions(available, count)
+        if not questions:
+            usage.refund()
+            if isinstance(top_up_error, (LLMError, CircuitOpenError)):
+                return llm_unavailable(top_up_error)
+            return jsonify({"error": "No questions available for this article"}), 503
+
+        # Not current: remixes never replace the library quiz
+        quiz = Quiz(
+            article_id=article.id,
+            summary=base.summary,
+            questions={
+                "questions": questions,
+                "related_topics": base.questions.get('related_topics', [])
+            },
+            version=base.version,
+            is_current=False
+        )
+        db.session.add(quiz)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        usage.refund()
+        return jsonify({"error": str(e)}), 500
+
+    response = jsonify({
+        "message": "Quiz ready",
+        "quiz_id": quiz.id,
+        "title": article.title,
+        "summary": quiz.summary,
+        "questions": [
+            {
+                "question": q['question'],
+                "options": q['options'],
+                "difficulty": q.get('difficulty', 'Unknown'),
+            }
+            for q in questions
+        ]
+    })
+    usage.settle()
+    return response, 201
 
 @main_bp.route('/api/user/history', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_user_history():
     # List User's Attempts (For Statistics)
     current_user_id = get_jwt_identity()
-    # Optimized: Join Quiz and Article, but restrict Article columns
-    attempts = QuizAttempt.query.options(
-        joinedload(QuizAttempt.quiz).joinedload(Quiz.article).load_only(Article.title, Article.url)
-    ).filter_by(user_id=current_user_id).order_by(QuizAttempt.completed_at.desc()).all()
-    
-    results = []
-    for attempt in attempts:
-        results.append({
-            "attempt_id": attempt.id,
-            "quiz_id": attempt.quiz.id,
-            "title": attempt.quiz.article.title,
-            "url": attempt.quiz.article.url,
-            "summary": attempt.quiz.summary,
-            "score": attempt.score,
-            "total": attempt.total_questions,
-            "date": attempt.completed_at.isoformat()
-        })
-    return jsonify(results), 200
+    query = db.session.query(
+        QuizAttempt.id.label('attempt_id'),
+        Quiz.id.label('quiz_id'),
+        Article.title.label('title'),
+        Article.url.label('url'),
+        Quiz.summary.label('summary'),
+        QuizAttempt.score.label('score'),
+        QuizAttempt.total_questions.label('total'),
+        QuizAttempt.completed_at.label('date')
+    ).join(Quiz, QuizAttempt.quiz_id == Quiz.id).join(Article, Quiz.article_id == Article.id).filter(
+        QuizAttempt.user_id == current_user_id
+    ).order_by(QuizAttempt.completed_at.desc())
+
+    return json_list_response(query), 200
 
 @main_bp.route('/api/user/history/<attempt_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_user_history_detail(attempt_id):
     current_user_id = get_jwt_identity()
     attempt = QuizAttempt.query.options(
@@ -163,11 +349,19 @@ def get_user_history_detail(attempt_id):
         "score": attempt.score,
         "total": attempt.total_questions,
         "answers": attempt.answers,
-        "date": attempt.completed_at.isoformat()
+        "date": attempt.completed_at
     }), 200
 
+@main_bp.route('/api/user/usage', methods=['GET'])
+@jwt_required()
+def get_user_usage():
+    # Generate quota counters and remaining tokens for the current user
+    days = max(1, min(request.args.get('days', 30, type=int), 365))
+    return jsonify(usage_summary(get_jwt_identity(), days)), 200
+
 @main_bp.route('/api/quiz/<quiz_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_quiz(quiz_id):
     quiz = Quiz.query.get_or_404(quiz_id)
     
@@ -188,14 +382,11 @@ def get_quiz(quiz_id):
         "related_topics": quiz.questions.get('related_topics', [])
     }), 200
 
-@main_bp.route('/api/quiz/<quiz_id>/submit', methods=['POST'])
-@jwt_required()
-def submit_quiz(quiz_id):
-    current_user_id = get_jwt_identity()
-    quiz = Quiz.query.get_or_404(quiz_id)
-    user_answers = request.json.get('answers', {}) # { "0": "Option A" }
-    
-    stored_questions = quiz.questions.get('questions', [])
+def grade_answers(stored_questions, user_answers):
+    """
+    Grades a submission against the stored questions.
+    Returns: (score, results_detail)
+    """
     score = 0
     results_detail = []
     
@@ -219,16 +410,32 @@ def submit_quiz(quiz_id):
             "is_correct": is_correct,
             "explanation": q_data['explanation']
         })
+
+    return score, results_detail
+
+@main_bp.route('/api/quiz/<quiz_id>/submit', methods=['POST'])
+@jwt_required()
+def submit_quiz(quiz_id):
+    current_user_id = get_jwt_identity()
+    quiz = Quiz.query.get_or_404(quiz_id)
+    user_answers = request.json.get('answers', {}) # { "0": "Option A" }
+    
+    stored_questions = quiz.questions.get('questions', [])
+    score, results_detail = grade_answers(stored_questions, user_answers)
     
     # Save Attempt
+    completed_at = datetime.utcnow()
     attempt = QuizAttempt(
         user_id=current_user_id,
         quiz_id=quiz_id,
         score=score,
         total_questions=len(stored_questions),
-        answers=results_detail
+        answers=results_detail,
+        completed_at=completed_at
     )
     db.session.add(attempt)
+    # Leaderboard / popularity aggregates, in the same transaction
+    record_attempt(quiz, current_user_id, score, len(stored_questions), completed_at)
     db.session.commit()
         
     return jsonify({
@@ -236,3 +443,85 @@ def submit_quiz(quiz_id):
         "total": len(stored_questions),
         "results": results_detail
     }), 200
+
+@main_bp.route('/api/quiz/<quiz_id>/leaderboard', methods=['GET'])
+@jwt_required()
+@read_replica
+def get_leaderboard(quiz_id):
+    # Served from the precomputed quiz_stats / quiz_user_best tables
+    limit = max(1, min(request.args.get('limit', Config.LEADERBOARD_PAGE_SIZE, type=int), 100))
+
+    after = None
+    cursor = request.args.get('after')
+    if cursor:
+        # Opaque to clients: "<best_score>|<achieved_at iso>|<user_id>"
+        try:
+            score, achieved_at, user_id = cursor.split('|', 2)
+            after = (int(score), datetime.fromisoformat(achieved_at), user_id)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    stats = db.session.get(QuizStats, quiz_id)
+    if stats is None and not db.session.query(Quiz.id).filter_by(id=quiz_id).first():
+        return jsonify({"error": "Quiz not found"}), 404
+
+    rows = leaderboard_page(quiz_id, limit, after)
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = f"{last.best_score}|{last.achieved_at.isoformat()}|{last.user_id}"
+
+    return jsonify({
+        "quiz_id": quiz_id,
+        "attempt_count": stats.attempt_count if stats else 0,
+        "average_score": (stats.score_sum / stats.attempt_count) if stats and stats.attempt_count else None,
+        "average_percent": (100.0 * stats.score_sum / stats.total_questions_sum) if stats and stats.total_questions_sum else None,
+        "entries": [
+            {
+                "username": r.username,
+                "best_score": r.best_score,
+                "total": r.total_questions,
+                "attempts": r.attempts,
+                "achieved_at": r.achieved_at
+            }
+            for r in rows
+        ],
+        "next_cursor": next_cursor
+    }), 200
+
+@main_bp.route('/api/quizzes/trending', methods=['GET'])
+@jwt_required()
+@read_replica
+def trending_quizzes():
+    # Ranked by the decayed scores written by `flask compact-stats`
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    query = db.session.query(
+        Quiz.id.label('id'),
+        Article.title.label('title'),
+        Article.url.label('url'),
+        Quiz.summary.label('summary'),
+        Quiz.created_at.label('created_at'),
+        TrendingArticle.recent_attempts.label('recent_attempts'),
+        TrendingArticle.score.label('trending_score')
+    ).join(Article, TrendingArticle.article_id == Article.id).join(
+        Quiz, (Quiz.article_id == Article.id) & Quiz.is_current.is_(True)
+    ).order_by(TrendingArticle.score.desc()).limit(limit)
+
+    return json_list_response(query), 200
+
+@main_bp.route('/api/health/llm', methods=['GET'])
+@jwt_required()
+def llm_health():
+    # Retry counters and circuit breaker state for monitoring (includes the
+    # last upstream error, so not public)
+    stats = get_llm_stats()
+    status = 503 if stats['breaker']['state'] == 'open' else 200
+    return jsonify(stats), status
+
+@main_bp.route('/api/health/fetch', methods=['GET'])
+@jwt_required()
+def fetch_health():
+    # Wikipedia fetch pacing and page cache counters for monitoring (includes
+    # the cache directory, so not public)
+    return jsonify(get_fetch_stats()), 200
@@ -0,0 +1,77 @@
+import decimal
+import orjson
+from flask import current_app, stream_with_context
+from flask.json.provider import JSONProvider
+
+# datetime, date, UUID and dataclasses are serialized natively by orjson.
+# Naive datetimes come out exactly like datetime.isoformat().
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj):
+    # Types orjson doesn't know, mirroring Flask's DefaultJSONProvider
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.json)."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        option = ORJSON_OPTIONS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=json_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=json_default, option=option),
+            mimetype=self.mimetype
+        )
+
+
+def _stream_array(rows, chunk_size):
+    # Encode rows in chunks so the per-yield overhead stays small
+    yield b'['
+    chunk = []
+    first = True
+    for row in rows:
+        chunk.append(orjson.dumps(row._asdict(), default=json_default, option=ORJSON_OPTIONS))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+def json_list_response(query):
+    """
+    Serializes a column-tuple query (labelled columns) as a JSON array.
+    With JSON_STREAM_LISTS enabled the array is streamed in chunks while
+    rows are fetched in batches, instead of being built in memory.
+    """
+    if current_app.config.get('JSON_STREAM_LISTS'):
+        chunk_size = current_app.config.get('JSON_STREAM_CHUNK_ROWS', 500)
+        rows = query.yield_per(chunk_size)
+        return current_app.response_class(
+            stream_with_context(_stream_array(rows, chunk_size)),
+            mimetype='application/json'
+        )
+
+    return current_app.json.response([row._asdict() for row in query.all()])
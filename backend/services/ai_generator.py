@@ -1,14 +1,16 @@
 import json
 import os
 import itertools
+import random
 import time
 import threading
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from functools import lru_cache
 from pydantic import BaseModel, Field, model_validator
 from typing import List
 from config import Config
+from services.sections import split_sections, label_sections
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.model_router import ModelRouter, TASK_SUMMARY, TASK_QUIZ
 
 # Key Rotation Logic
 keys_str = os.getenv('GOOGLE_API_KEYS')
@@ -49,52 +51,218 @@ def rotate_key():
     
     return current_key
 
-def get_llm():
+model_router = ModelRouter(
+    tiers={
+        'fast': Config.GEMINI_MODEL_FAST,
+        'standard': Config.GEMINI_MODEL,
+        'fallback': Config.GEMINI_MODEL_FALLBACK,
+    },
+    key_count=len(API_KEYS),
+    short_article_chars=Config.LLM_SHORT_ARTICLE_CHARS,
+    pressure_threshold=Config.LLM_PRESSURE_THRESHOLD,
+    window=Config.LLM_PRESSURE_WINDOW_SECONDS
+)
+
+def get_llm(timeout=None, model=None):
     """Returns a new LLM instance with the current active key."""
     if not current_key:
         raise ValueError("No Google API Key available.")
+    # Imported on first use: the Gemini/LangChain stack takes seconds to load
+    from langchain_google_genai import ChatGoogleGenerativeAI
     return ChatGoogleGenerativeAI(
-        model=Config.GEMINI_MODEL,
+        model=model or Config.GEMINI_MODEL,
         temperature=0.7,
-        google_api_key=current_key
+        google_api_key=current_key,
+        timeout=timeout,
+        max_retries=1  # Retries are handled by run_with_retry
     )
 
-def run_with_retry(chain_creator_func, input_data, max_retries=None):
+# --- Retry Policy ---
+
+ERROR_QUOTA = 'quota'          # 429 / exhausted or invalid key: rotate key
+ERROR_TRANSIENT = 'transient'  # 5xx, timeouts, connection errors: back off
+ERROR_CLIENT = 'client'        # other 4xx, bad request: never retried
+ERROR_PARSE = 'parse'          # upstream fine, output unusable: re-ask
+
+class LLMError(Exception):
+    def __init__(self, message, kind):
+        super().__init__(message)
+        self.kind = kind
+
+llm_breaker = CircuitBreaker(
+    'gemini',
+    failure_threshold=Config.LLM_BREAKER_FAILURES,
+    reset_timeout=Config.LLM_BREAKER_RESET_SECONDS
+)
+
+_stats_lock = threading.Lock()
+_stats = {'calls': 0, 'attempts': 0, 'deadline_exceeded': 0, 'errors': {}}
+
+def _count(key, kind=None):
+    with _stats_lock:
+        if kind:
+            _stats['errors'][kind] = _stats['errors'].get(kind, 0) + 1
+        else:
+            _stats[key] += 1
+
+def get_llm_stats():
+    """Retry/breaker counters for monitoring."""
+    with _stats_lock:
+        stats = {**_stats, 'errors': dict(_stats['errors'])}
+    return {
+        'keys': len(API_KEYS),
+        **stats,
+        'breaker': llm_breaker.snapshot(),
+        'models': model_router.snapshot()
+    }
+
+def _error_chain(error):
+    # LangChain wraps the Gemini client errors; look through the causes too
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def classify_error(error):
+    """Maps an exception from an LLM call to one of the ERROR_* kinds."""
+    for err in _error_chain(error):
+        if type(err).__name__ in ('OutputParserException', 'ValidationError', 'JSONDecodeError'):
+            return ERROR_PARSE
+        if isinstance(err, (TimeoutError, ConnectionError)):
+            return ERROR_TRANSIENT
+
+        code = getattr(err, 'code', None)
+        if not isinstance(code, int):
+            code = getattr(err, 'status_code', None)
+        if isinstance(code, int) and 400 <= code < 600:
+            if code == 429:
+                return ERROR_QUOTA
+            if code >= 500 or code == 408:
+                return ERROR_TRANSIENT
+            if code in (401, 403) and 'API key' in str(err):
+                return ERROR_QUOTA
+            return ERROR_CLIENT
+
+    message = str(error)
+    if any(m in message for m in ('429', 'RESOURCE_EXHAUSTED', 'API_KEY_INVALID', 'API key not valid')):
+        return ERROR_QUOTA
+    if any(m in message for m in ('500', '502', '503', '504', 'UNAVAILABLE', 'INTERNAL',
+                                  'DEADLINE_EXCEEDED', 'timed out', 'Timeout')):
+        return ERROR_TRANSIENT
+    if any(m in message for m in ('400', '401', '403', '404', 'INVALID_ARGUMENT',
+                                  'PERMISSION_DENIED', 'NOT_FOUND', 'No Google API Key')):
+        return ERROR_CLIENT
+    # Unknown: retry cautiously
+    return ERROR_TRANSIENT
+
+def backoff_delay(failures):
+    """Exponential backoff with full jitter."""
+    ceiling = min(Config.LLM_BACKOFF_MAX_SECONDS, Config.LLM_BACKOFF_BASE_SECONDS * (2 ** failures))
+    return random.uniform(0, ceiling)
+
+def run_with_retry(chain_creator_func, input_data, max_retries=None, parse=None, deadline=None,
+                   task=TASK_QUIZ, text_length=0):
     """
     Executes a LangChain chain with key rotation on failure.
     chain_creator_func: A function that accepts an 'llm' instance and returns a chain.
+    parse: optional function applied to the response; parse errors re-ask the LLM.
+    deadline: overall time budget in seconds across all attempts.
+    task / text_length: used by the model router to pick the model tier.
+
+    Quota errors rotate the key (or switch tier once every key is throttled
+    on a model), transient errors back off exponentially (with jitter),
+    client errors fail immediately. Transient failures, and quota errors once
+    every tier is exhausted, feed a circuit breaker that fails fast while
+    Gemini is down.
+    Raises LLMError, or CircuitOpenError while the breaker is open.
     """
     if max_retries is None:
-        # Try enough times to cycle through all keys multiple times
-        max_retries = len(API_KEYS) * 5 if API_KEYS else 3
-    
-    last_error = None
-    
+        max_retries = max(3, len(API_KEYS) * 2)
+    deadline_at = time.monotonic() + (deadline or Config.LLM_CALL_DEADLINE_SECONDS)
+
+    _count('calls')
+    failures = {ERROR_QUOTA: 0, ERROR_TRANSIENT: 0, ERROR_PARSE: 0}
+    last_error, last_kind = None, ERROR_TRANSIENT
+    attempts = 0
+    out_of_time = False
+
+    models = model_router.route(task, text_length)
+    model = models[0]
+
     for attempt in range(max_retries):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            out_of_time = True
+            break
+
+        llm_breaker.before_call()  # CircuitOpenError while Gemini is down
+        _count('attempts')
+        attempts += 1
         try:
             # Always get the latest key
-            llm = get_llm()
+            llm = get_llm(timeout=min(remaining, Config.LLM_REQUEST_TIMEOUT_SECONDS), model=model)
             chain = chain_creator_func(llm)
-            return chain.invoke(input_data)
+            response = chain.invoke(input_data)
         except Exception as e:
-            error_msg = str(e)
-            is_quota_error = "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
-            
-            if is_quota_error:
-                print(f"⚠️ Quota exceeded on key ...{current_key[-4:] if current_key else 'None'}. (Attempt {attempt + 1}/{max_retries})")
+            kind = classify_error(e)
+            _count('errors', kind)
+            last_error, last_kind = e, kind
+            key_tail = current_key[-4:] if current_key else 'None'
+
+            if kind in (ERROR_CLIENT, ERROR_PARSE):
+                llm_breaker.release()
+                print(f"❌ Non-retryable {kind} error on key ...{key_tail}: {e}")
+                raise LLMError(f"LLM request failed ({kind}): {e}", kind) from e
+
+            failures[kind] += 1
+            print(f"⚠️ {kind} error on {model} key ...{key_tail}: {e}. (Attempt {attempt + 1}/{max_retries})")
+
+            if kind == ERROR_QUOTA:
+                model_router.record_quota_error(model, current_key)
+                # A throttled key or model isn't an outage: only trip the
+                # breaker once every tier is out of quota
+                if all(model_router.is_exhausted(m) for m in models):
+                    llm_breaker.record_failure(kind, str(e))
+                else:
+                    llm_breaker.release()
+                if model_router.is_exhausted(model) and len(models) > 1:
+                    # Every key is throttled on this model: move to the next tier now
+                    models = models[1:]
+                    print(f"🔀 {model} quota exhausted, falling back to {models[0]}")
+                    model = models[0]
+                    continue
+                rotate_key()
+                # Fresh keys are tried almost immediately; back off per full cycle
+                delay = backoff_delay(failures[kind] // max(len(API_KEYS), 1))
             else:
-                print(f"⚠️ Error on key ...{current_key[-4:] if current_key else 'None'}: {e}. (Attempt {attempt + 1}/{max_retries})")
-            
-            last_error = e
-            # Rotate key and retry
-            rotate_key()
-            
-            # Wait a bit before retrying to let the new key settle or the old one cool down
-            # If we have many keys, we can switch fast. If few, wait longer.
-            wait_time = 1.0 if len(API_KEYS) > 1 else 5.0
-            time.sleep(wait_time)
-            
-    raise Exception(f"All API keys failed after {max_retries} attempts. Last error: {last_error}")
+                llm_breaker.record_failure(kind, str(e))
+                delay = backoff_delay(failures[kind] - 1)
+
+            if time.monotonic() + delay >= deadline_at:
+                out_of_time = True
+                break
+            time.sleep(delay)
+            continue
+
+        llm_breaker.record_success()
+        model_router.record_success(model, current_key)
+        if parse is None:
+            return response
+
+        try:
+            return parse(response)
+        except Exception as e:
+            _count('errors', ERROR_PARSE)
+            failures[ERROR_PARSE] += 1
+            last_error, last_kind = e, ERROR_PARSE
+            print(f"⚠️ Unparseable LLM output: {e}. (Attempt {attempt + 1}/{max_retries})")
+            if failures[ERROR_PARSE] > Config.LLM_PARSE_RETRIES:
+                raise LLMError(f"LLM output could not be parsed: {e}", ERROR_PARSE) from e
+
+    if out_of_time:
+        _count('deadline_exceeded')
+    raise LLMError(f"LLM call failed after {attempts} attempts. Last error: {last_error}", last_kind)
 
 # --- Summary Generation ---
 
@@ -112,11 +280,12 @@ def generate_summary(text):
     """
     
     def create_chain(llm):
+        from langchain_core.prompts import PromptTemplate
         prompt = PromptTemplate(template=template, input_variables=["text"])
         return prompt | llm
 
     try:
-        response = run_with_retry(create_chain, {"text": text})
+        response = run_with_retry(create_chain, {"text": text}, task=TASK_SUMMARY, text_length=len(text))
         return response.content.strip()
     except Exception as e:
         print(f"Error generating summary: {e}")
@@ -131,6 +300,7 @@ class Question(BaseModel):
     correct_answer: str = Field(description="The correct answer text (must be one of the options)")
     explanation: str = Field(description="Explanation of why the answer is correct, citing the text")
     difficulty: str = Field(description="Difficulty level: Easy, Medium, or Hard")
+    source_sections: List[int] = Field(default_factory=list, description="Numbers of the [S#] sections the question is based on")
 
     @model_validator(mode='after')
     def check_answer_in_options(self):
@@ -154,13 +324,25 @@ class QuizOutput(BaseModel):
     questions: List[Question] = Field(description="List of 5 to 10 quiz questions")
     related_topics: List[str] = Field(description="List of 3 related Wikipedia topics")
 
-parser = PydanticOutputParser(pydantic_object=QuizOutput)
+@lru_cache(maxsize=None)
+def get_parser():
+    """Output parser for QuizOutput, built on first use."""
+    from langchain_core.output_parsers import PydanticOutputParser
+    return PydanticOutputParser(pydantic_object=QuizOutput)
 
-def generate_quiz(text):
-    """Generates 5-10 quiz questions based solely on the text."""
+@lru_cache(maxsize=None)
+def get_format_instructions():
+    return get_parser().get_format_instructions()
+
+def generate_quiz(text, num_questions=None):
+    """
+    Generates 5-10 quiz questions (or exactly num_questions) based solely on the text.
+    Each question is tagged with the [S#] sections of the text it was drawn from.
+    """
+    question_count = str(num_questions) if num_questions else "5 to 10"
     template = """
     You are an expert quiz creator.
-    Create a quiz with 5 to 10 questions based ONLY on the provided article text.
+    Create a quiz with {question_count} questions based ONLY on the provided article text.
     
     Constraints:
     1. STRICTLY output valid JSON.
@@ -169,6 +351,7 @@ def generate_quiz(text):
     4. Provide the correct answer and a brief explanation.
     5. varied difficulty (Easy, Medium, Hard).
     6. Also suggest 3 related Wikipedia topics.
+    7. The text is split into sections marked [S0], [S1], ...; list the section numbers each question is based on.
     
     Article Text:
     {text}
@@ -177,19 +360,31 @@ def generate_quiz(text):
     """
     
     def create_chain(llm):
+        from langchain_core.prompts import PromptTemplate
         prompt = PromptTemplate(
             template=template,
             input_variables=["text"],
-            partial_variables={"format_instructions": parser.get_format_instructions()}
+            partial_variables={
+                "format_instructions": get_format_instructions(),
+                "question_count": question_count
+            }
         )
         return prompt | llm
     
     try:
-        response = run_with_retry(create_chain, {"text": text})
-        # Parse the output to ensure it matches specific structure
-        parsed_output = parser.parse(response.content)
+        # Parse inside the retry loop so malformed output is re-requested
+        parsed_output = run_with_retry(
+            create_chain,
+            {"text": label_sections(split_sections(text))},
+            parse=lambda response: get_parser().parse(response.content),
+            task=TASK_QUIZ,
+            text_length=len(text)
+        )
         # Convert back to dict for JSON serialization
         return parsed_output.dict()
+    except (LLMError, CircuitOpenError):
+        # Callers map these to 503 / 502
+        raise
     except Exception as e:
         print(f"Error generating quiz: {e}")
         raise Exception("Failed to generate valid quiz JSON from AI")
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed    -> calls pass; `failure_threshold` consecutive failures open it.
+    open      -> calls are rejected until `reset_timeout` seconds have passed.
+    half_open -> a single probe call is let through; success closes the
+                 breaker, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._counters = {
+            'successes': 0,
+            'failures': 0,
+            'rejected': 0,
+            'opened': 0,
+        }
+        self._failures_by_kind = {}
+        self._last_failure = None
+
+    def before_call(self):
+        """Raises CircuitOpenError when the call must not go upstream."""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._counters['rejected'] += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self._counters['rejected'] += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open; probe in progress")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._counters['successes'] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self, kind='error', message=None):
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures_by_kind[kind] = self._failures_by_kind.get(kind, 0) + 1
+            self._last_failure = {'kind': kind, 'message': (message or '')[:200], 'at': time.time()}
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._counters['opened'] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Ends a call that was neither a success nor an upstream failure."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def snapshot(self):
+        """State and counters for monitoring."""
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in_seconds': retry_in,
+                **self._counters,
+                'failures_by_kind': dict(self._failures_by_kind),
+                'last_failure': self._last_failure,
+            }
@@ -0,0 +1,310 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from config import Config
+
+# Wikipedia requires a User-Agent header
+USER_AGENT = 'WikiQuizAI/1.0 (mailto:your-email@example.com)'
+
+CachedPage = namedtuple('CachedPage', 'body etag last_modified fetched_at')
+
+
+class FetchBusyError(Exception):
+    """Raised when no fetch slot for a host frees up within the wait limit."""
+
+
+class HostScheduler:
+    """
+    Per-host politeness for outgoing fetches: at most `concurrency`
+    requests in flight and request starts spaced at least 1/rate seconds
+    apart (rate 0 = no spacing). Start times are handed out in call order
+    and callers sleep until theirs comes up; a caller that would wait
+    longer than `max_wait` gets a FetchBusyError instead.
+    """
+
+    def __init__(self, concurrency, rate, max_wait):
+        self.concurrency = max(concurrency, 1)
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+        self._counters = {'requests': 0, 'rejected': 0, 'waited_seconds': 0.0}
+
+    def _reject(self, host):
+        with self._lock:
+            self._counters['rejected'] += 1
+        raise FetchBusyError(f"Too many pending fetches for {host}; try again later")
+
+    @contextmanager
+    def slot(self, host):
+        entered = time.monotonic()
+        deadline = entered + self.max_wait
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.concurrency)
+
+        if not semaphore.acquire(timeout=self.max_wait):
+            self._reject(host)
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                if start > deadline:
+                    self._counters['rejected'] += 1
+                    raise FetchBusyError(f"Too many pending fetches for {host}; try again later")
+                self._next_start[host] = start + self.interval
+                self._counters['requests'] += 1
+                self._counters['waited_seconds'] += start - entered
+
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            semaphore.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'max_concurrency_per_host': self.concurrency,
+                'min_interval_seconds': self.interval,
+                **self._counters,
+            }
+
+
+class PageCache:
+    """
+    Size-bounded on-disk cache of fetched pages.
+
+    Bodies are content-addressed: stored gzipped under objects/<sha256>, so
+    identical pages share a file. A SQLite index maps each URL to its body
+    along with the HTTP validators and access time; once the stored bytes
+    exceed `max_bytes` the least recently used URLs are evicted.
+    Safe to share between threads and processes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, 'index.sqlite3'),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30
+        )
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute('CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)')
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def get(self, url):
+        """The cached page for `url` (any age), or None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT digest, etag, last_modified, fetched_at FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+
+        digest, etag, last_modified, fetched_at = row
+        try:
+            with gzip.open(self._path(digest), 'rb') as f:
+                body = f.read().decode('utf-8')
+        except (OSError, EOFError):
+            # Object removed or truncated behind our back: treat as a miss
+            with self._lock:
+                self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._count('misses')
+            return None
+
+        with self._lock:
+            self._db.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (time.time(), url))
+        self._count('hits')
+        return CachedPage(body, etag, last_modified, fetched_at)
+
+    def put(self, url, body, etag=None, last_modified=None):
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial object
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        size = os.path.getsize(path)
+
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute('SELECT digest FROM entries WHERE url = ?', (url,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (url, digest, size, etag, last_modified, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, digest, size, etag, last_modified, now, now)
+            )
+            if previous and previous[0] != digest:
+                self._drop_if_unreferenced(previous[0])
+            self._counters['stores'] += 1
+            self._evict()
+
+    def revalidated(self, url):
+        """Marks a cached page as fresh again after a 304."""
+        now = time.time()
+        with self._lock:
+            self._db.execute('UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+
+    def clear(self):
+        """Empties the cache. Returns the number of cached pages (URLs) removed."""
+        with self._lock:
+            digests = [d for (d,) in self._db.execute('SELECT DISTINCT digest FROM entries')]
+            removed = self._db.execute('DELETE FROM entries').rowcount
+            for digest in digests:
+                self._unlink(digest)
+        return removed
+
+    def _unlink(self, digest):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _drop_if_unreferenced(self, digest):
+        if not self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+            self._unlink(digest)
+
+    def _total_bytes(self):
+        return self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM entries GROUP BY digest)'
+        ).fetchone()[0]
+
+    def _evict(self):
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        oldest = self._db.execute('SELECT url, digest, size FROM entries ORDER BY accessed_at ASC').fetchall()
+        for url, digest, size in oldest:
+            if total <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._counters['evictions'] += 1
+            # Shared objects only free space once their last URL is gone
+            if not self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+                self._unlink(digest)
+                total -= size
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {
+                'directory': self.directory,
+                'entries': entries,
+                'bytes': self._total_bytes(),
+                'max_bytes': self.max_bytes,
+                **self._counters,
+            }
+
+
+_scheduler = None
+_cache = None
+_init_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _init_lock:
+            if _scheduler is None:
+                _scheduler = HostScheduler(
+                    Config.FETCH_MAX_CONCURRENCY_PER_HOST,
+                    Config.FETCH_RATE_PER_HOST,
+                    Config.FETCH_MAX_WAIT_SECONDS
+                )
+    return _scheduler
+
+
+def get_cache():
+    """The process-wide page cache, or None when it's disabled."""
+    global _cache
+    if _cache is None and Config.FETCH_CACHE_MAX_BYTES > 0:
+        with _init_lock:
+            if _cache is None:
+                _cache = PageCache(Config.FETCH_CACHE_DIR, Config.FETCH_CACHE_MAX_BYTES)
+    return _cache
+
+
+def fetch_page(url, max_age=None):
+    """
+    Returns the HTML of `url`. A cached copy younger than `max_age` seconds
+    (FETCH_CACHE_TTL_SECONDS by default) is returned without touching the
+    network; older copies are revalidated with a conditional request, so
+    max_age=0 always checks upstream but still skips unchanged downloads.
+    Raises requests.RequestException or FetchBusyError.
+    """
+    # Imported on first use to keep app startup fast
+    import requests
+
+    if max_age is None:
+        max_age = Config.FETCH_CACHE_TTL_SECONDS
+
+    cache = get_cache()
+    cached = cache.get(url) if cache else None
+    if cached and time.time() - cached.fetched_at < max_age:
+        return cached.body
+
+    headers = {'User-Agent': USER_AGENT}
+    if cached and cached.etag:
+        headers['If-None-Match'] = cached.etag
+    if cached and cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+
+    with get_scheduler().slot(urlparse(url).netloc):
+        response = requests.get(url, headers=headers, timeout=Config.FETCH_TIMEOUT_SECONDS)
+
+    if cached and response.status_code == 304:
+        cache.revalidated(url)
+        return cached.body
+
+    response.raise_for_status()
+    body = response.text
+    if cache:
+        cache.put(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return body
+
+
+def get_fetch_stats():
+    cache = get_cache()
+    return {
+        'scheduler': get_scheduler().snapshot(),
+        'cache': cache.snapshot() if cache else None,
+    }
@@ -0,0 +1,179 @@
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from config import Config
+from database import upsert
+from models import db, User, Quiz, QuizAttempt, QuizStats, QuizUserBest, ArticlePopularity, TrendingArticle
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(moment):
+    """Start of the popularity bucket containing a naive UTC datetime."""
+    seconds = Config.POPULARITY_BUCKET_SECONDS
+    elapsed = int((moment - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def record_attempt(quiz, user_id, score, total_questions, completed_at):
+    """
+    Folds one attempt into the aggregate tables. Runs in the caller's
+    transaction; increments are done in SQL so concurrent submits don't
+    lose updates.
+    """
+    stats = upsert(QuizStats).values(
+        quiz_id=quiz.id,
+        attempt_count=1,
+        score_sum=score,
+        total_questions_sum=total_questions,
+        updated_at=completed_at
+    )
+    db.session.execute(stats.on_conflict_do_update(
+        index_elements=[QuizStats.quiz_id],
+        set_={
+            'attempt_count': QuizStats.attempt_count + 1,
+            'score_sum': QuizStats.score_sum + stats.excluded.score_sum,
+            'total_questions_sum': QuizStats.total_questions_sum + stats.excluded.total_questions_sum,
+            'updated_at': stats.excluded.updated_at,
+        }
+    ))
+
+    best = upsert(QuizUserBest).values(
+        quiz_id=quiz.id,
+        user_id=user_id,
+        best_score=score,
+        total_questions=total_questions,
+        attempts=1,
+        achieved_at=completed_at
+    )
+    improved = best.excluded.best_score > QuizUserBest.best_score
+    db.session.execute(best.on_conflict_do_update(
+        index_elements=[QuizUserBest.quiz_id, QuizUserBest.user_id],
+        set_={
+            'attempts': QuizUserBest.attempts + 1,
+            'best_score': case((improved, best.excluded.best_score), else_=QuizUserBest.best_score),
+            'achieved_at': case((improved, best.excluded.achieved_at), else_=QuizUserBest.achieved_at),
+            'total_questions': best.excluded.total_questions,
+        }
+    ))
+
+    popularity = upsert(ArticlePopularity).values(
+        article_id=quiz.article_id,
+        bucket_start=bucket_start(completed_at),
+        attempts=1
+    )
+    db.session.execute(popularity.on_conflict_do_update(
+        index_elements=[ArticlePopularity.article_id, ArticlePopularity.bucket_start],
+        set_={'attempts': ArticlePopularity.attempts + 1}
+    ))
+
+
+def leaderboard_page(quiz_id, limit, after=None):
+    """
+    One page of the leaderboard, best score first, earliest achiever first
+    on ties. `after` is the (best_score, achieved_at, user_id) of the last
+    row of the previous page (keyset pagination: cost is O(page)).
+    """
+    query = db.session.query(
+        QuizUserBest.user_id,
+        User.username,
+        QuizUserBest.best_score,
+        QuizUserBest.total_questions,
+        QuizUserBest.attempts,
+        QuizUserBest.achieved_at
+    ).join(User, User.id == QuizUserBest.user_id).filter(QuizUserBest.quiz_id == quiz_id)
+
+    if after:
+        score, achieved_at, user_id = after
+        query = query.filter(
+            (QuizUserBest.best_score < score)
+            | ((QuizUserBest.best_score == score) & (QuizUserBest.achieved_at > achieved_at))
+            | ((QuizUserBest.best_score == score) & (QuizUserBest.achieved_at == achieved_at)
+               & (QuizUserBest.user_id > user_id))
+        )
+
+    return query.order_by(
+        QuizUserBest.best_score.desc(),
+        QuizUserBest.achieved_at.asc(),
+        QuizUserBest.user_id.asc()
+    ).limit(limit).all()
+
+
+def compact(now=None):
+    """
+    Periodic job: recomputes decayed trending scores from the popularity
+    buckets inside the trending window and drops older buckets.
+    Returns (articles_scored, buckets_deleted).
+    """
+    now = now or datetime.utcnow()
+    window_start = now - timedelta(hours=Config.TRENDING_WINDOW_HOURS)
+    half_life = Config.TRENDING_HALF_LIFE_HOURS
+
+    rows = db.session.query(
+        ArticlePopularity.article_id,
+        ArticlePopularity.bucket_start,
+        ArticlePopularity.attempts
+    ).filter(ArticlePopularity.bucket_start >= window_start).all()
+
+    scores = {}
+    for article_id, start, attempts in rows:
+        age_hours = max((now - start).total_seconds() / 3600, 0)
+        score, count = scores.get(article_id, (0.0, 0))
+        scores[article_id] = (score + attempts * math.pow(0.5, age_hours / half_life), count + attempts)
+
+    db.session.query(TrendingArticle).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(TrendingArticle, [
+        {'article_id': a, 'score': score, 'recent_attempts': count, 'computed_at': now}
+        for a, (score, count) in scores.items()
+    ])
+    deleted = db.session.query(ArticlePopularity).filter(
+        ArticlePopularity.bucket_start < window_start
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+    return len(scores), deleted
+
+
+def rebuild():
+    """Recomputes quiz_stats, quiz_user_best and popularity from quiz_attempts."""
+    db.session.query(QuizStats).delete(synchronize_session=False)
+    db.session.query(QuizUserBest).delete(synchronize_session=False)
+    db.session.query(ArticlePopularity).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    db.session.bulk_insert_mappings(QuizStats, [
+        {'quiz_id': q, 'attempt_count': c, 'score_sum': s or 0, 'total_questions_sum': t or 0, 'updated_at': now}
+        for q, c, s, t in db.session.query(
+            QuizAttempt.quiz_id, func.count(), func.sum(QuizAttempt.score), func.sum(QuizAttempt.total_questions)
+        ).group_by(QuizAttempt.quiz_id)
+    ])
+
+    # Best attempt per (quiz, user): highest score, earliest on ties
+    best = {}
+    counts = {}
+    buckets = {}
+    attempts = db.session.query(
+        QuizAttempt.quiz_id, QuizAttempt.user_id, QuizAttempt.score,
+        QuizAttempt.total_questions, QuizAttempt.completed_at, Quiz.article_id
+    ).join(Quiz, Quiz.id == QuizAttempt.quiz_id).order_by(QuizAttempt.completed_at.asc()).yield_per(1000)
+
+    for quiz_id, user_id, score, total, completed_at, article_id in attempts:
+        key = (quiz_id, user_id)
+        counts[key] = counts.get(key, 0) + 1
+        if key not in best or score > best[key][0]:
+            best[key] = (score, total, completed_at)
+        bucket = (article_id, bucket_start(completed_at or now))
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    db.session.bulk_insert_mappings(QuizUserBest, [
+        {'quiz_id': q, 'user_id': u, 'best_score': s, 'total_questions': t,
+         'attempts': counts[(q, u)], 'achieved_at': at or now}
+        for (q, u), (s, t, at) in best.items()
+    ])
+    db.session.bulk_insert_mappings(ArticlePopularity, [
+        {'article_id': a, 'bucket_start': b, 'attempts': n}
+        for (a, b), n in buckets.items()
+    ])
+    db.session.commit()
+    return len(best)
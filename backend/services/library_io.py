@@ -0,0 +1,251 @@
+import gzip
+import sys
+from datetime import datetime
+import orjson
+from database import upsert
+from models import db, Article, Quiz, QuizAttempt, User, generate_uuid
+from serialization import ORJSON_OPTIONS, json_default
+
+FORMAT_NAME = 'wikiquiz-library'
+FORMAT_VERSION = 1
+
+# What to include of an article's content
+BODIES_ALL = 'all'    # raw_html + cleaned_text
+BODIES_TEXT = 'text'  # cleaned_text only (raw_html is the heavy part)
+BODIES_NONE = 'none'  # metadata only
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdout.buffer if 'w' in mode else sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=6) if 'w' in mode else gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _parse_dt(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+# --- Export ---
+
+def _write(out, record):
+    out.write(orjson.dumps(record, default=json_default, option=ORJSON_OPTIONS))
+    out.write(b'\n')
+
+
+def export_library(path, bodies=BODIES_ALL, include_attempts=False, batch_size=1000):
+    """
+    Streams articles, quizzes and optionally attempts to (gzipped) NDJSON.
+    Rows are fetched with yield_per, i.e. a server-side cursor on
+    PostgreSQL, so memory stays bounded by batch_size.
+    Returns counts per record type.
+    """
+    counts = {'article': 0, 'quiz': 0, 'attempt': 0}
+    out = _open(path, 'wb')
+    try:
+        _write(out, {
+            'type': 'header',
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'exported_at': datetime.utcnow(),
+            'bodies': bodies,
+        })
+
+        columns = [Article.id, Article.url, Article.title, Article.created_at, Article.refreshed_at]
+        if bodies in (BODIES_ALL, BODIES_TEXT):
+            columns.append(Article.cleaned_text)
+        if bodies == BODIES_ALL:
+            columns.append(Article.raw_html)
+
+        for row in db.session.query(*columns).order_by(Article.id).yield_per(batch_size):
+            record = row._asdict()
+            record['type'] = 'article'
+            del record['id']
+            _write(out, record)
+            counts['article'] += 1
+
+        quizzes = db.session.query(
+            Quiz.id, Article.url.label('article_url'), Quiz.summary, Quiz.questions,
+            Quiz.version, Quiz.is_current, Quiz.created_at
+        ).join(Article, Quiz.article_id == Article.id).order_by(Quiz.id).yield_per(batch_size)
+        for row in quizzes:
+            _write(out, {'type': 'quiz', **row._asdict()})
+            counts['quiz'] += 1
+
+        if include_attempts:
+            # Users aren't exported; attempts are matched by username on import
+            attempts = db.session.query(
+                QuizAttempt.id, QuizAttempt.quiz_id, User.username, QuizAttempt.score,
+                QuizAttempt.total_questions, QuizAttempt.answers, QuizAttempt.completed_at
+            ).join(User, QuizAttempt.user_id == User.id).order_by(QuizAttempt.id).yield_per(batch_size)
+            for row in attempts:
+                _write(out, {'type': 'attempt', **row._asdict()})
+                counts['attempt'] += 1
+    finally:
+        if out is sys.stdout.buffer:
+            out.flush()
+        else:
+            out.close()
+
+    return counts
+
+
+# --- Import ---
+
+def _import_articles(batch):
+    stmt = upsert(Article)
+    update = {
+        'title': stmt.excluded.title,
+        'refreshed_at': stmt.excluded.refreshed_at,
+    }
+    # Only overwrite bodies that were actually exported
+    if all('cleaned_text' in r for r in batch):
+        update['cleaned_text'] = stmt.excluded.cleaned_text
+    if all('raw_html' in r for r in batch):
+        update['raw_html'] = stmt.excluded.raw_html
+
+    # Ids are generated here: only new URLs use them, existing rows keep theirs.
+    # New rows without bodies get empty text; it is fetched on first use
+    # (services.refresher.fill_missing_body) or by `flask refresh-articles`.
+    rows = [{
+        'id': generate_uuid(),
+        'url': r['url'],
+        'title': r['title'],
+        'cleaned_text': r.get('cleaned_text', ''),
+        'raw_html': r.get('raw_html', ''),
+        'created_at': _parse_dt(r.get('created_at')),
+        'refreshed_at': _parse_dt(r.get('refreshed_at')),
+    } for r in batch]
+
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[Article.url], set_=update), rows)
+
+
+def _import_quizzes(batch):
+    urls = {r['article_url'] for r in batch}
+    article_ids = dict(db.session.query(Article.url, Article.id).filter(Article.url.in_(urls)))
+
+    rows = [{
+        'id': r['id'],
+        'article_id': article_ids[r['article_url']],
+        'summary': r['summary'],
+        'questions': r['questions'],
+        'version': r.get('version', 1),
+        'is_current': r.get('is_current', True),
+        'created_at': _parse_dt(r.get('created_at')),
+    } for r in batch if r['article_url'] in article_ids]
+    if not rows:
+        return 0
+
+    # Keep a single current quiz per article (enforced by a unique index):
+    # demote the other current quizzes before the new ones are written
+    current = {r['article_id']: r['id'] for r in rows if r['is_current']}
+    for r in rows:
+        r['is_current'] = current.get(r['article_id']) == r['id']
+    if current:
+        db.session.query(Quiz).filter(
+            Quiz.article_id.in_(current.keys()),
+            Quiz.is_current.is_(True),
+            Quiz.id.notin_(current.values())
+        ).update({'is_current': False}, synchronize_session=False)
+
+    stmt = upsert(Quiz)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[Quiz.id],
+        set_={
+            'article_id': stmt.excluded.article_id,
+            'summary': stmt.excluded.summary,
+            'questions': stmt.excluded.questions,
+            'version': stmt.excluded.version,
+            'is_current': stmt.excluded.is_current,
+        }
+    ), rows)
+
+    return len(rows)
+
+
+def _import_attempts(batch):
+    usernames = {r['username'] for r in batch}
+    user_ids = dict(db.session.query(User.username, User.id).filter(User.username.in_(usernames)))
+
+    rows = [{
+        'id': r['id'],
+        'user_id': user_ids[r['username']],
+        'quiz_id': r['quiz_id'],
+        'score': r['score'],
+        'total_questions': r['total_questions'],
+        'answers': r['answers'],
+        'completed_at': _parse_dt(r.get('completed_at')),
+    } for r in batch if r['username'] in user_ids]
+    if not rows:
+        return 0
+
+    # Core execution (same transaction) so the result reports how many rows
+    # were actually inserted; attempts already present are left alone
+    result = db.session.connection().execute(
+        upsert(QuizAttempt).on_conflict_do_nothing(index_elements=[QuizAttempt.id]), rows
+    )
+    return result.rowcount
+
+
+def import_library(path, batch_size=1000):
+    """
+    Idempotent import of an export file. Articles are upserted by URL,
+    quizzes and attempts by id, one executemany statement per batch.
+    Attempts that already exist, or whose usernames don't exist locally,
+    are skipped.
+    Returns counts per record type.
+    """
+    counts = {'article': 0, 'quiz': 0, 'attempt': 0, 'skipped': 0}
+    batches = {'article': [], 'quiz': [], 'attempt': []}
+
+    def flush(kind):
+        batch = batches[kind]
+        if not batch:
+            return
+        if kind == 'article':
+            _import_articles(batch)
+            imported = len(batch)
+        elif kind == 'quiz':
+            imported = _import_quizzes(batch)
+        else:
+            imported = _import_attempts(batch)
+        counts[kind] += imported
+        counts['skipped'] += len(batch) - imported
+        db.session.commit()
+        batches[kind] = []
+
+    source = _open(path, 'rb')
+    try:
+        for line_no, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            kind = record.pop('type', None)
+
+            if kind == 'header':
+                if record.get('format') != FORMAT_NAME or record.get('version', 0) > FORMAT_VERSION:
+                    raise ValueError(f"Unsupported export format: {record}")
+                continue
+            if kind not in batches:
+                raise ValueError(f"Line {line_no}: unknown record type {kind!r}")
+
+            # Records are written articles -> quizzes -> attempts; flush the
+            # parents before their children so foreign keys resolve.
+            if kind == 'quiz':
+                flush('article')
+            elif kind == 'attempt':
+                flush('article')
+                flush('quiz')
+
+            batches[kind].append(record)
+            if len(batches[kind]) >= batch_size:
+                flush(kind)
+
+        for kind in ('article', 'quiz', 'attempt'):
+            flush(kind)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+
+    return counts
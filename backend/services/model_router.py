@@ -0,0 +1,91 @@
+import threading
+import time
+
+TASK_SUMMARY = 'summary'
+TASK_QUIZ = 'quiz'
+
+
+class ModelRouter:
+    """
+    Picks the Gemini model for a task.
+
+    Tiers:
+      fast      cheap/quick model for summaries and short articles
+      standard  the regular quiz model
+      fallback  used when the preferred model's quota is exhausted
+
+    Key-pool pressure for a model is the share of API keys that got a 429
+    on it within `window` seconds. At `pressure_threshold` the router starts
+    preferring another tier; at 1.0 (every key throttled) the model is
+    treated as exhausted and skipped while any alternative is available.
+    """
+
+    def __init__(self, tiers, key_count, short_article_chars, pressure_threshold=0.5, window=60.0):
+        # Keep only configured tiers, dropping duplicates of the same model
+        self.tiers = {name: model for name, model in tiers.items() if model}
+        self.key_count = max(key_count, 1)
+        self.short_article_chars = short_article_chars
+        self.pressure_threshold = pressure_threshold
+        self.window = window
+
+        self._lock = threading.Lock()
+        # model -> {key: last_quota_error_monotonic}
+        self._throttled = {}
+        self._routed = {}
+
+    def _prune(self, model, now):
+        keys = self._throttled.get(model, {})
+        for key in [k for k, at in keys.items() if now - at > self.window]:
+            del keys[key]
+        return keys
+
+    def pressure(self, model):
+        with self._lock:
+            return len(self._prune(model, time.monotonic())) / self.key_count
+
+    def record_quota_error(self, model, key):
+        with self._lock:
+            self._throttled.setdefault(model, {})[key] = time.monotonic()
+
+    def record_success(self, model, key):
+        with self._lock:
+            self._throttled.get(model, {}).pop(key, None)
+
+    def preferred_tier(self, task, text_length):
+        if task == TASK_SUMMARY or text_length < self.short_article_chars:
+            return 'fast'
+        return 'standard'
+
+    def route(self, task, text_length):
+        """Ordered list of models to try for this call."""
+        preferred = self.preferred_tier(task, text_length)
+        order = [preferred] + [t for t in ('standard', 'fast', 'fallback') if t != preferred]
+
+        candidates = []
+        for tier in order:
+            model = self.tiers.get(tier)
+            if model and model not in candidates:
+                candidates.append(model)
+
+        pressures = {m: self.pressure(m) for m in candidates}
+        # Stable sort: healthy models first, original preference kept within each group
+        candidates.sort(key=lambda m: (pressures[m] >= 1.0, pressures[m] >= self.pressure_threshold))
+
+        with self._lock:
+            self._routed[candidates[0]] = self._routed.get(candidates[0], 0) + 1
+        return candidates
+
+    def is_exhausted(self, model):
+        return self.pressure(model) >= 1.0
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'tiers': dict(self.tiers),
+                'routed': dict(self._routed),
+                'pressure': {
+                    model: len(self._prune(model, now)) / self.key_count
+                    for model in set(self.tiers.values())
+                },
+            }
@@ -0,0 +1,74 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash jobs are already queued."""
+
+
+# Lazily created so CLI commands (migrations, reset_db) never spawn workers.
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(max(1, Config.PASSWORD_HASH_MAX_PENDING))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # 'spawn' avoids forking a multi-threaded server process
+                _executor = ProcessPoolExecutor(
+                    max_workers=Config.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _executor
+
+
+def _run(func, *args):
+    """Runs a CPU-heavy hash function in the process pool (or inline)."""
+    if Config.PASSWORD_HASH_WORKERS <= 0:
+        return func(*args)
+
+    # Bound the amount of queued work so a burst can't build an unbounded backlog
+    if not _pending.acquire(timeout=5):
+        raise PasswordHasherBusy("Password hashing queue is full")
+    try:
+        return _get_executor().submit(func, *args).result()
+    finally:
+        _pending.release()
+
+
+def hash_password(password):
+    return _run(
+        generate_password_hash,
+        password,
+        Config.PASSWORD_HASH_METHOD,
+        Config.PASSWORD_SALT_LENGTH
+    )
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+@lru_cache(maxsize=None)
+def _method_prefix(method, salt_length):
+    # Werkzeug expands short names ('scrypt' -> 'scrypt:32768:8:1'), so derive
+    # the canonical prefix from a real hash once per process.
+    return generate_password_hash('', method, salt_length).split('$', 1)[0]
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with different parameters than Config."""
+    try:
+        method, salt, _ = password_hash.split('$', 2)
+    except ValueError:
+        return True
+
+    expected = _method_prefix(Config.PASSWORD_HASH_METHOD, Config.PASSWORD_SALT_LENGTH)
+    return method != expected or len(salt) != Config.PASSWORD_SALT_LENGTH
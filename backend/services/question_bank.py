@@ -0,0 +1,137 @@
+import hashlib
+import random
+import re
+from config import Config
+from models import db, BankQuestion
+from services.sections import split_sections, section_hash
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+# MinHash over character shingles: robust to rewordings like
+# "What year did X ..." vs "In what year did X ..."
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_non_word = re.compile(r"[^\w\s]")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_question(q):
+    """Question + answer, lowercased, without punctuation or extra spaces."""
+    text = f"{q.get('question', '')} {q.get('correct_answer', '')}".lower()
+    return _whitespace.sub(" ", _non_word.sub(" ", text)).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def minhash(normalized):
+    padded = f" {normalized} "
+    shingles = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in shingles
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def normalize_difficulty(value):
+    value = (value or "").strip().capitalize()
+    return value if value in DIFFICULTIES else "Medium"
+
+
+def add_to_bank(article_id, questions):
+    """
+    Adds validated questions to the article's bank, skipping exact and
+    near-duplicates of questions already in it. Does not commit.
+    Returns the number of questions added.
+    """
+    existing = db.session.query(BankQuestion.fingerprint, BankQuestion.minhash).filter_by(
+        article_id=article_id
+    ).all()
+    seen_fingerprints = {row.fingerprint for row in existing}
+    signatures = [row.minhash for row in existing]
+
+    added = 0
+    for q in questions:
+        normalized = normalize_question(q)
+        fp = fingerprint(normalized)
+        if fp in seen_fingerprints:
+            continue
+
+        sig = minhash(normalized)
+        if any(similarity(sig, other) >= Config.QUESTION_BANK_SIMILARITY for other in signatures):
+            continue
+
+        db.session.add(BankQuestion(
+            article_id=article_id,
+            difficulty=normalize_difficulty(q.get("difficulty")),
+            fingerprint=fp,
+            minhash=sig,
+            data=q
+        ))
+        seen_fingerprints.add(fp)
+        signatures.append(sig)
+        added += 1
+
+    return added
+
+
+def usable_questions(article):
+    """Bank questions whose source sections still exist in the current text."""
+    current = {section_hash(s) for s in split_sections(article.cleaned_text)}
+    rows = db.session.query(BankQuestion.difficulty, BankQuestion.data).filter_by(article_id=article.id).all()
+    return [
+        (row.difficulty, row.data) for row in rows
+        if set(row.data.get("source_hashes") or []) <= current
+    ]
+
+
+def is_low(available, count):
+    return available < count * Config.QUESTION_BANK_MIN_RATIO
+
+
+def is_saturated(article):
+    """True when top-ups stopped adding questions for the article's current text."""
+    return article.bank_saturated_hash == fingerprint(article.cleaned_text)
+
+
+def mark_saturated(article):
+    article.bank_saturated_hash = fingerprint(article.cleaned_text)
+
+
+def assemble_questions(available, count, rng=None):
+    """
+    Picks `count` questions balanced across difficulties: round-robin over
+    Easy/Medium/Hard, random within each level, topping up from whatever
+    levels still have questions.
+    """
+    rng = rng or random.Random()
+    buckets = {d: [] for d in DIFFICULTIES}
+    for difficulty, data in available:
+        buckets.setdefault(difficulty, []).append(data)
+    for bucket in buckets.values():
+        rng.shuffle(bucket)
+
+    picked = []
+    while len(picked) < count and any(buckets.values()):
+        for difficulty in list(buckets):
+            if buckets[difficulty] and len(picked) < count:
+                picked.append(buckets[difficulty].pop())
+
+    rng.shuffle(picked)
+    return picked
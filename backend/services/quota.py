@@ -0,0 +1,247 @@
+import atexit
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from config import Config
+from database import upsert
+from models import db, GenerateUsage
+from services.rate_limiter import create_limiter
+
+# What a request costs depends on whether it reaches Gemini
+KIND_CACHED = 'cached'  # quiz already in the library / remix from the bank
+KIND_COLD = 'cold'      # scrape + LLM generation
+
+SCOPE_USER = 'user'
+SCOPE_GLOBAL = 'global'
+
+_GLOBAL_KEY = 'all'
+
+# Throttled requests are counted in memory and written in one batch at most
+# this long after the first one, so a flood of rejected calls doesn't turn
+# into a flood of DB writes
+THROTTLE_FLUSH_SECONDS = 10.0
+
+user_limiter = create_limiter(
+    'generate-user', Config.GENERATE_USER_CAPACITY, Config.GENERATE_USER_PER_SEC,
+    Config.RATE_LIMIT_STORAGE_URL
+)
+# Shared by everyone, drawn only by cold generations: bounds the load on the key pool
+global_limiter = create_limiter(
+    'generate-global', Config.GENERATE_GLOBAL_CAPACITY, Config.GENERATE_GLOBAL_PER_SEC,
+    Config.RATE_LIMIT_STORAGE_URL
+)
+
+_throttle_lock = threading.Lock()
+_pending_throttles = {}  # (user_id, day) -> count not yet written
+_flush_timer = None
+_exit_hook_app = None
+
+
+def cost_of(kind):
+    return Config.GENERATE_COST_COLD if kind == KIND_COLD else Config.GENERATE_COST_CACHED
+
+
+def _record(user_id, day=None, cache_hits=0, generations=0, tokens_spent=0, throttled=0):
+    stmt = upsert(GenerateUsage).values(
+        user_id=user_id,
+        day=day or datetime.utcnow().date(),
+        cache_hits=cache_hits,
+        generations=generations,
+        tokens_spent=tokens_spent,
+        throttled=throttled
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[GenerateUsage.user_id, GenerateUsage.day],
+        set_={
+            'cache_hits': GenerateUsage.cache_hits + stmt.excluded.cache_hits,
+            'generations': GenerateUsage.generations + stmt.excluded.generations,
+            'tokens_spent': GenerateUsage.tokens_spent + stmt.excluded.tokens_spent,
+            'throttled': GenerateUsage.throttled + stmt.excluded.throttled,
+        }
+    ))
+
+
+def _take_pending():
+    with _throttle_lock:
+        pending = dict(_pending_throttles)
+        _pending_throttles.clear()
+    return pending
+
+
+def flush_throttled():
+    """Writes the pending throttle counts. Needs an app context; commits."""
+    pending = _take_pending()
+    if not pending:
+        return
+    try:
+        for (user_id, day), count in pending.items():
+            _record(user_id, day=day, throttled=count)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Could not write throttle counters: {e}")
+
+
+def _flush_later(app):
+    global _flush_timer
+    with _throttle_lock:
+        _flush_timer = None
+    with app.app_context():
+        flush_throttled()
+
+
+def _flush_at_exit():
+    with _exit_hook_app.app_context():
+        flush_throttled()
+
+
+def _note_throttled(user_id):
+    global _flush_timer, _exit_hook_app
+    with _throttle_lock:
+        key = (user_id, datetime.utcnow().date())
+        _pending_throttles[key] = _pending_throttles.get(key, 0) + 1
+        if _flush_timer is not None:
+            return
+        # First throttle of a window: schedule one batched write for it and
+        # everything that follows, and make sure a shutdown doesn't lose it
+        app = current_app._get_current_object()
+        _flush_timer = threading.Timer(THROTTLE_FLUSH_SECONDS, _flush_later, args=(app,))
+        _flush_timer.daemon = True
+        _flush_timer.start()
+        if _exit_hook_app is None:
+            _exit_hook_app = app
+            atexit.register(_flush_at_exit)
+
+
+def _pending_throttled(user_id, since):
+    with _throttle_lock:
+        return sum(n for (uid, day), n in _pending_throttles.items() if uid == user_id and day >= since)
+
+
+class Charge:
+    """
+    Tokens taken for one request. Check `allowed` first; then either
+    settle() once the work succeeded (records the usage counters) or
+    refund() if it failed, which gives the tokens back.
+    """
+
+    def __init__(self, user_id, kind):
+        self.user_id = user_id
+        self.kind = kind
+        self.cost = cost_of(kind)
+        self.retry_after = 0
+        self.scope = None
+        self._done = False
+        self.allowed = self._take(self.cost, kind == KIND_COLD)
+
+    def _take(self, user_cost, draws_pool):
+        allowed, retry_after = user_limiter.consume(self.user_id, user_cost)
+        if not allowed:
+            self.retry_after, self.scope = retry_after, SCOPE_USER
+            return False
+        if draws_pool:
+            allowed, retry_after = global_limiter.consume(_GLOBAL_KEY, Config.GENERATE_COST_COLD)
+            if not allowed:
+                user_limiter.refund(self.user_id, user_cost)
+                self.retry_after, self.scope = retry_after, SCOPE_GLOBAL
+                return False
+        return True
+
+    def upgrade(self):
+        """
+        Turns a cached request into a cold one (e.g. a remix that has to top
+        up its question bank), charging the difference. Returns False, with
+        nothing taken, when either bucket can't pay.
+        """
+        if self.kind == KIND_COLD:
+            return True
+        if not self._take(Config.GENERATE_COST_COLD - self.cost, draws_pool=True):
+            return False
+        self.kind, self.cost = KIND_COLD, Config.GENERATE_COST_COLD
+        return True
+
+    def downgrade(self):
+        """Undoes upgrade() when the extra work failed."""
+        if self.kind != KIND_COLD:
+            return
+        cached = Config.GENERATE_COST_CACHED
+        user_limiter.refund(self.user_id, self.cost - cached)
+        global_limiter.refund(_GLOBAL_KEY, Config.GENERATE_COST_COLD)
+        self.kind, self.cost = KIND_CACHED, cached
+
+    def refund(self):
+        if self._done or not self.allowed:
+            return
+        self._done = True
+        user_limiter.refund(self.user_id, self.cost)
+        if self.kind == KIND_COLD:
+            global_limiter.refund(_GLOBAL_KEY, Config.GENERATE_COST_COLD)
+
+    def settle(self):
+        if self._done or not self.allowed:
+            return
+        self._done = True
+        _record(
+            self.user_id,
+            cache_hits=int(self.kind == KIND_CACHED),
+            generations=int(self.kind == KIND_COLD),
+            tokens_spent=self.cost
+        )
+        # Piggyback pending throttle counts on this commit
+        for (user_id, day), count in _take_pending().items():
+            _record(user_id, day=day, throttled=count)
+        db.session.commit()
+
+
+def charge(user_id, kind):
+    """
+    Takes the request's cost from the user's bucket and, for cold
+    generations, from the global bucket too (refunding the user if the
+    global bucket refuses). Returns a Charge; refused charges are counted
+    as throttled.
+    """
+    result = Charge(user_id, kind)
+    if not result.allowed:
+        _note_throttled(user_id)
+    return result
+
+
+def usage_summary(user_id, days=30):
+    """Today's counters, totals over the last `days` days and the current bucket level."""
+    today = datetime.utcnow().date()
+    since = today - timedelta(days=days - 1)
+
+    row = db.session.get(GenerateUsage, (user_id, today))
+    totals = db.session.query(
+        func.coalesce(func.sum(GenerateUsage.cache_hits), 0),
+        func.coalesce(func.sum(GenerateUsage.generations), 0),
+        func.coalesce(func.sum(GenerateUsage.tokens_spent), 0),
+        func.coalesce(func.sum(GenerateUsage.throttled), 0)
+    ).filter(GenerateUsage.user_id == user_id, GenerateUsage.day >= since).one()
+
+    def counters(cache_hits, generations, tokens_spent, throttled):
+        return {
+            "cache_hits": cache_hits,
+            "generations": generations,
+            "tokens_spent": tokens_spent,
+            "throttled": throttled,
+        }
+
+    today_counts = counters(row.cache_hits, row.generations, row.tokens_spent, row.throttled) \
+        if row else counters(0, 0, 0, 0)
+    today_counts["throttled"] += _pending_throttled(user_id, today)
+    period_counts = counters(*totals)
+    period_counts["throttled"] += _pending_throttled(user_id, since)
+
+    return {
+        "today": today_counts,
+        f"last_{days}_days": period_counts,
+        "limits": {
+            "capacity": Config.GENERATE_USER_CAPACITY,
+            "remaining": int(user_limiter.remaining(user_id)),
+            "refill_per_second": Config.GENERATE_USER_PER_SEC,
+            "cost_cached": Config.GENERATE_COST_CACHED,
+            "cost_cold": Config.GENERATE_COST_COLD,
+        },
+    }
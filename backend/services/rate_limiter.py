@@ -0,0 +1,155 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    In-process token-bucket limiter keyed by an arbitrary string
+    (client IP, username, ...).
+    Each key gets `capacity` tokens that refill at `rate` tokens/second.
+    At most `max_keys` buckets are kept; beyond that the least recently
+    used one is dropped (it starts over full if seen again).
+    """
+
+    def __init__(self, capacity, rate, max_keys=10000):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.max_keys = max_keys
+        # key -> (tokens, last_refill_monotonic), least recently used first
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - last) * self.rate)
+
+    def consume(self, key, cost=1):
+        """
+        Takes `cost` tokens from the bucket of `key`.
+        Returns: (allowed, retry_after_seconds)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                missing = cost - tokens
+                retry_after = math.ceil(missing / self.rate) if self.rate > 0 else 60
+                allowed = False
+
+            self._touch(key)
+
+        return allowed, retry_after
+
+    def _touch(self, key):
+        # O(1) LRU bookkeeping, so a flood of distinct keys can't make
+        # every call slower or grow memory without bound
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def refund(self, key, cost=1):
+        """Gives back tokens taken by a call that ended up not being made."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refill(key, now)
+            self._buckets[key] = (min(self.capacity, tokens + cost), now)
+            self._touch(key)
+
+    def remaining(self, key):
+        with self._lock:
+            return self._refill(key, time.monotonic())
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+# Refill + take in one round trip so concurrent workers can't both spend the
+# same tokens. A negative cost refunds; cost 0 just reads the bucket.
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisTokenBucketLimiter:
+    """
+    Same interface as TokenBucketLimiter, with buckets kept in Redis (or a
+    compatible store) so every worker process shares them. Buckets expire
+    once they would have refilled completely.
+    If the store is unreachable, calls are allowed (fail open) and logged.
+    """
+
+    def __init__(self, url, name, capacity, rate):
+        import redis
+
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._errors = (redis.RedisError,)
+        full_refill = self.capacity / self.rate if self.rate > 0 else 86400
+        self._ttl_ms = int((full_refill + 60) * 1000)
+
+    def _key(self, key):
+        return f"ratelimit:{self.name}:{key}"
+
+    def _run(self, key, cost):
+        try:
+            allowed, tokens = self._script(
+                keys=[self._key(key)],
+                args=[self.capacity, self.rate, cost, self._ttl_ms]
+            )
+        except self._errors as e:
+            print(f"Rate limit store unavailable ({self.name}): {e}")
+            return True, self.capacity
+        return bool(allowed), float(tokens)
+
+    def consume(self, key, cost=1):
+        allowed, tokens = self._run(key, cost)
+        if allowed:
+            return True, 0
+        retry_after = math.ceil((cost - tokens) / self.rate) if self.rate > 0 else 60
+        return False, retry_after
+
+    def refund(self, key, cost=1):
+        self._run(key, -cost)
+
+    def remaining(self, key):
+        return self._run(key, 0)[1]
+
+    def reset(self, key):
+        try:
+            self._client.delete(self._key(key))
+        except self._errors as e:
+            print(f"Rate limit store unavailable ({self.name}): {e}")
+
+
+def create_limiter(name, capacity, rate, storage_url=None):
+    """Redis-backed limiter when a storage URL is configured, in-process otherwise."""
+    if storage_url:
+        return RedisTokenBucketLimiter(storage_url, name, capacity, rate)
+    return TokenBucketLimiter(capacity, rate)
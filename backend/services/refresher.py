@@ -0,0 +1,157 @@
+import concurrent.futures
+from datetime import datetime
+from config import Config
+from models import db, Quiz
+from services.scraper import fetch_article
+from services.ai_generator import generate_summary, generate_quiz
+from services.sections import split_sections, section_hash, tag_questions, SECTION_SEPARATOR
+from services.question_bank import add_to_bank
+
+
+def fill_missing_body(article):
+    """
+    Articles imported without bodies (export-library --bodies none) have
+    empty text; fetch it before anything derives questions from it.
+    Commits. Returns True if a fetch was needed.
+    """
+    if article.cleaned_text:
+        return False
+    article.title, article.raw_html, article.cleaned_text = fetch_article(article.url)
+    article.refreshed_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def refresh_article(article):
+    """
+    Re-fetches an article and updates its quiz incrementally.
+
+    Questions whose source sections are unchanged are kept; only questions
+    drawn from edited or removed sections are regenerated, from the changed
+    text alone. When questions change a new Quiz version is created and the
+    previous one is kept (is_current=False) so existing attempts stay valid.
+
+    Returns a dict describing what happened.
+    """
+    # Always check upstream; an unchanged page costs only a 304
+    title, raw_html, cleaned_text = fetch_article(article.url, max_age=0)
+
+    if not article.cleaned_text:
+        # Imported without a body: nothing to diff against, just store it.
+        # Question hashes are checked against the new text on use.
+        article.title, article.raw_html, article.cleaned_text = title, raw_html, cleaned_text
+        article.refreshed_at = datetime.utcnow()
+        db.session.commit()
+        return {"status": "body_fetched", "article_id": article.id}
+
+    old_sections = split_sections(article.cleaned_text)
+    new_sections = split_sections(cleaned_text)
+    old_hashes = {section_hash(s) for s in old_sections}
+    new_hashes = [section_hash(s) for s in new_sections]
+
+    if set(new_hashes) == old_hashes and title == article.title:
+        article.refreshed_at = datetime.utcnow()
+        db.session.commit()
+        return {"status": "unchanged", "article_id": article.id}
+
+    def apply_article_update():
+        # Deferred until after the LLM calls so no row stays locked meanwhile
+        article.title = title
+        article.raw_html = raw_html
+        article.cleaned_text = cleaned_text
+        article.refreshed_at = datetime.utcnow()
+
+    quiz = Quiz.query.filter_by(article_id=article.id, is_current=True).first()
+    if not quiz:
+        apply_article_update()
+        db.session.commit()
+        return {"status": "article_updated", "article_id": article.id}
+
+    questions = [dict(q) for q in quiz.questions.get('questions', [])]
+
+    # Quizzes generated before section tracking: attribute them to the old text
+    legacy = [q for q in questions if 'source_hashes' not in q]
+    if legacy:
+        tag_questions({"questions": legacy}, old_sections)
+
+    current = set(new_hashes)
+    stale = {i for i, q in enumerate(questions)
+             if not q['source_hashes'] or not set(q['source_hashes']) <= current}
+
+    changed_sections = [s for s, h in zip(new_sections, new_hashes) if h not in old_hashes]
+    changed_chars = sum(len(s) for s in changed_sections)
+    refresh_summary = changed_chars >= Config.REFRESH_SUMMARY_THRESHOLD * max(len(cleaned_text), 1)
+
+    # Removed-only edits leave no new text; draw replacements from the whole article
+    source_sections = changed_sections or new_sections
+
+    summary = quiz.summary
+    replacements = []
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        summary_future = executor.submit(generate_summary, cleaned_text) if refresh_summary else None
+        quiz_future = None
+        if stale:
+            quiz_future = executor.submit(
+                generate_quiz, SECTION_SEPARATOR.join(source_sections), len(stale)
+            )
+
+        if quiz_future:
+            new_data = tag_questions(quiz_future.result(), source_sections)
+            replacements = new_data.get('questions', [])[:len(stale)]
+        if summary_future:
+            new_summary = summary_future.result()
+            if new_summary != "Summary generation failed.":
+                summary = new_summary
+
+    result = {
+        "article_id": article.id,
+        "changed_sections": len(changed_sections),
+        "kept_questions": len(questions) - len(stale),
+        "regenerated_questions": len(replacements),
+        "summary_regenerated": summary != quiz.summary,
+        # Whether Gemini was called at all (the caller bills on this)
+        "llm_used": bool(summary_future or quiz_future),
+    }
+
+    if not stale:
+        # Questions still valid: update in place, no new version needed
+        apply_article_update()
+        quiz.summary = summary
+        db.session.commit()
+        return {"status": "quiz_kept", "quiz_id": quiz.id, "version": quiz.version, **result}
+
+    # Replace stale questions in place to keep the original ordering;
+    # drop any the LLM didn't deliver.
+    replacement_iter = iter(replacements)
+    merged = []
+    for i, q in enumerate(questions):
+        if i in stale:
+            q = next(replacement_iter, None)
+        if q is not None:
+            merged.append(q)
+
+    # Optimistic check: another refresh may have superseded this version
+    superseded = Quiz.query.filter_by(id=quiz.id, is_current=True).update(
+        {"is_current": False}, synchronize_session=False
+    )
+    if not superseded:
+        db.session.rollback()
+        return {"status": "conflict", "article_id": article.id}
+
+    apply_article_update()
+
+    new_quiz = Quiz(
+        article_id=article.id,
+        summary=summary,
+        questions={
+            "questions": merged,
+            "related_topics": quiz.questions.get('related_topics', [])
+        },
+        version=quiz.version + 1,
+        is_current=True
+    )
+    db.session.add(new_quiz)
+    add_to_bank(article.id, replacements)
+    db.session.commit()
+
+    return {"status": "quiz_updated", "quiz_id": new_quiz.id, "version": new_quiz.version, **result}
@@ -1,5 +1,3 @@
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urlunparse
 import re
 
@@ -13,22 +11,23 @@ def normalize_url(url):
     normalized = urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
     return normalized
 
-def fetch_article(url):
+def fetch_article(url, max_age=None):
     """
     Fetches and cleans a Wikipedia article.
+    The page comes from the local page cache when fresh enough (see
+    services.fetcher.fetch_page for `max_age`).
     Returns: (title, raw_html, cleaned_text)
     """
+    # Imported on first use to keep app startup fast
+    import requests
+    from bs4 import BeautifulSoup
+    from services.fetcher import fetch_page, FetchBusyError
+
     try:
-        # Wikipedia requires a User-Agent header
-        headers = {
-            'User-Agent': 'WikiQuizAI/1.0 (mailto:your-email@example.com)'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        raw_html = fetch_page(url, max_age=max_age)
+    except (requests.RequestException, FetchBusyError) as e:
         raise Exception(f"Failed to fetch URL: {str(e)}")
 
-    raw_html = response.text
     soup = BeautifulSoup(raw_html, 'html.parser')
 
     # Extract Title
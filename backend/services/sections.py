@@ -0,0 +1,51 @@
+import hashlib
+import re
+
+# fetch_article joins cleaned paragraphs with a blank line; each paragraph
+# is one section for diffing purposes.
+SECTION_SEPARATOR = "\n\n"
+
+_whitespace = re.compile(r"\s+")
+_word = re.compile(r"\w+")
+
+
+def split_sections(cleaned_text):
+    return [s.strip() for s in cleaned_text.split(SECTION_SEPARATOR) if s.strip()]
+
+
+def section_hash(section):
+    """Stable short hash of a section, insensitive to whitespace changes."""
+    normalized = _whitespace.sub(" ", section).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def label_sections(sections):
+    """Prefixes each section with a [S#] marker the LLM can cite."""
+    return SECTION_SEPARATOR.join(f"[S{i}] {s}" for i, s in enumerate(sections))
+
+
+def _best_matching_section(question, sections):
+    # Fallback when the LLM didn't cite a section: pick the one sharing
+    # the most words with the answer and explanation.
+    words = set(_word.findall(f"{question.get('correct_answer', '')} {question.get('explanation', '')}".lower()))
+    best, best_score = None, 0
+    for i, s in enumerate(sections):
+        score = len(words & set(_word.findall(s.lower())))
+        if score > best_score:
+            best, best_score = i, score
+    return best
+
+
+def tag_questions(quiz_data, sections):
+    """
+    Replaces the LLM's section indices with content hashes so that a
+    question can later be matched to its sources after a refresh.
+    """
+    hashes = [section_hash(s) for s in sections]
+    for q in quiz_data.get("questions", []):
+        indices = [i for i in q.pop("source_sections", None) or [] if isinstance(i, int) and 0 <= i < len(hashes)]
+        if not indices:
+            best = _best_matching_section(q, sections)
+            indices = [best] if best is not None else []
+        q["source_hashes"] = sorted({hashes[i] for i in indices})
+    return quiz_data